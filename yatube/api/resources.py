@@ -0,0 +1,153 @@
+"""Описание ресурсов API и их сериализация без создания моделей.
+
+Каждое публичное поле ресурса соответствует выражению для values_list(),
+поэтому запрос содержит только выбранные через ?fields= столбцы, а JOIN
+автора или группы появляется, лишь когда запрошено их поле.
+"""
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from posts.models import Comment, Follow, Group, Post
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+class Resource:
+    """Набор полей ресурса и порядок keyset-пагинации.
+
+    key — поле сортировки (id — последний ключ при равенстве),
+    descending — от новых к старым.
+    """
+
+    def __init__(self, queryset, fields, key='id', descending=False,
+                 converters=None):
+        self.queryset = queryset
+        self.fields = fields
+        self.key = key
+        self.descending = descending
+        self.converters = converters or {}
+
+    def select(self, requested):
+        """Имена полей из ?fields=; ValueError для неизвестных."""
+        if not requested:
+            return list(self.fields)
+        names = [name for name in requested.split(',') if name]
+        unknown = set(names) - self.fields.keys()
+        if unknown:
+            raise ValueError(
+                'Неизвестные поля: ' + ', '.join(sorted(unknown))
+            )
+        return names
+
+    def _record(self, names, row):
+        return {
+            name: self.converters.get(name, _plain)(value)
+            for name, value in zip(names, row)
+        }
+
+    def serialize(self, queryset, names):
+        """Словари с полями names для строк queryset."""
+        lookups = [self.fields[name] for name in names]
+        for row in queryset.values_list(*lookups):
+            yield self._record(names, row)
+
+    def page(self, queryset, names, cursor=None, limit=DEFAULT_LIMIT):
+        """Страница строк после cursor и курсор следующей.
+
+        Ключ сортировки выбирается вместе с полями одним запросом.
+        """
+        order = (self.key, 'id')
+        if self.descending:
+            order = tuple(f'-{field}' for field in order)
+        position = self._decode(cursor)
+        if position is not None:
+            value, pk = position
+            direction = 'lt' if self.descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.key}__{direction}': value})
+                | Q(**{self.key: value, f'id__{direction}': pk})
+            )
+        lookups = [self.fields[name] for name in names]
+        rows = list(
+            queryset.order_by(*order)
+            .values_list(*lookups, self.key, 'id')[:limit + 1]
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = self._encode(rows[limit - 1][-2:])
+        records = [self._record(names, row) for row in rows[:limit]]
+        return records, next_cursor
+
+    def _encode(self, position):
+        value, pk = position
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        return urlsafe_base64_encode(f'{value}|{pk}'.encode())
+
+    def _decode(self, cursor):
+        try:
+            raw = urlsafe_base64_decode(cursor or '').decode()
+            value, pk = raw.split('|')
+            pk = int(pk)
+            value = int(value) if self.key == 'id' else parse_datetime(value)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            return None
+        return None if value is None else (value, pk)
+
+
+def _plain(value):
+    return value
+
+
+def _image_url(name):
+    return default_storage.url(name) if name else None
+
+
+POSTS = Resource(
+    Post.objects.all(),
+    {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'updated': 'updated',
+        'author': 'author__username',
+        'group': 'group__slug',
+        'image': 'image',
+        'comments_count': 'comments_count',
+    },
+    key='pub_date',
+    descending=True,
+    converters={'image': _image_url},
+)
+GROUPS = Resource(
+    Group.objects.all(),
+    {
+        'id': 'id',
+        'slug': 'slug',
+        'title': 'title',
+        'description': 'description',
+    },
+)
+COMMENTS = Resource(
+    Comment.objects.all(),
+    {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    },
+    key='created',
+)
+FOLLOWS = Resource(
+    Follow.objects.all(),
+    {
+        'id': 'id',
+        'user': 'user__username',
+        'author': 'author__username',
+    },
+    descending=True,
+)
@@ -0,0 +1,198 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group if i % 2 else None,
+                text=f'Пост {i}',
+            )
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def test_post_list_cursor_pagination(self):
+        url = reverse('api:post_list')
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, 'fields': 'id'}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            seen += [post['id'] for post in data['results']]
+            cursor = data['next']
+            if cursor is None:
+                break
+        self.assertEqual(
+            seen, [post.pk for post in reversed(self.posts)]
+        )
+
+    def test_sparse_fieldset_skips_joins(self):
+        url = reverse('api:post_list')
+        with self.assertNumQueries(1) as context:
+            data = self.client.get(url, {'fields': 'id,text'}).json()
+        self.assertEqual(set(data['results'][0]), {'id', 'text'})
+        self.assertNotIn('JOIN', context.captured_queries[0]['sql'])
+        data = self.client.get(url, {'fields': 'author,group'}).json()
+        self.assertEqual(
+            data['results'][1], {'author': 'author', 'group': 'group'}
+        )
+
+    def test_unknown_field(self):
+        response = self.client.get(
+            reverse('api:post_list'), {'fields': 'id,password'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_filters_and_detail(self):
+        data = self.client.get(
+            reverse('api:post_list'), {'group': 'group'}
+        ).json()
+        self.assertEqual(len(data['results']), 2)
+        post = self.posts[0]
+        data = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': post.pk})
+        ).json()
+        self.assertEqual(data['text'], 'Пост 0')
+        self.assertEqual(data['comments_count'], 1)
+        self.assertIsNone(data['image'])
+        response = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': 0})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_comments_groups_follows(self):
+        data = self.client.get(reverse(
+            'api:comment_list', kwargs={'post_id': self.posts[0].pk}
+        )).json()
+        self.assertEqual(data['results'][0]['author'], 'reader')
+        data = self.client.get(reverse(
+            'api:group_detail', kwargs={'slug': 'group'}
+        )).json()
+        self.assertEqual(data['title'], 'Группа')
+        url = reverse('api:follow_list')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        data = self.client.get(url).json()
+        self.assertEqual(data['results'][0]['author'], 'author')
+
+    def test_gzip_and_read_only(self):
+        response = self.client.get(
+            reverse('api:post_list'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data['results']), 5)
+        response = self.client.post(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 405)
+
+
+class BatchApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def post_json(self, name, items):
+        return self.client.post(
+            reverse(name),
+            json.dumps({'items': items}),
+            content_type='application/json',
+        )
+
+    def test_requires_login(self):
+        response = self.post_json('api:post_batch', [{'text': 'x'}])
+        self.assertEqual(response.status_code, 401)
+
+    def test_post_batch(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.client.force_login(self.author)
+        items = [
+            {'text': 'Кот первый', 'group': self.group.pk},
+            {'text': ''},
+            {'text': 'Второй', 'group': 999},
+            {'text': 'Третий'},
+        ]
+        # Число запросов не зависит от размера пачки.
+        with self.assertNumQueries(10):
+            response = self.post_json('api:post_batch', items)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['created'], 2)
+        results = data['results']
+        self.assertIn('text', results[1]['errors'])
+        self.assertIn('group', results[2]['errors'])
+        first = Post.objects.get(pk=results[0]['id'])
+        self.assertEqual(
+            (first.text, first.group, first.author, first.tokens),
+            ('Кот первый', self.group, self.author, 'кот перв'),
+        )
+        self.assertEqual(
+            Post.objects.get(pk=results[3]['id']).text, 'Третий'
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 3
+        )
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']][:2],
+            [results[3]['id'], results[0]['id']],
+        )
+
+    def test_comment_batch(self):
+        self.client.force_login(self.reader)
+        items = [
+            {'post': self.post.pk, 'text': 'Один'},
+            {'post': self.post.pk, 'text': 'Два'},
+            {'post': 0, 'text': 'Мимо'},
+            {'text': 'Без поста'},
+        ]
+        data = self.post_json('api:comment_batch', items).json()
+        self.assertEqual(data['created'], 2)
+        self.assertEqual(
+            Comment.objects.get(pk=data['results'][1]['id']).text, 'Два'
+        )
+        self.assertIn('errors', data['results'][2])
+        self.assertIn('errors', data['results'][3])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+
+    def test_rejects_bad_payload(self):
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('api:post_batch'), 'not json',
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.post_json(
+            'api:post_batch', [{'text': 'x'}] * 101
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            self.client.get(reverse('api:post_batch')).status_code, 405
+        )
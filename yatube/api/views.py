@@ -0,0 +1,194 @@
+import json
+from functools import wraps
+
+from django.http import JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_http_methods
+
+from posts.batch import create_comments, create_posts
+from posts.forms import CommentForm, PostForm
+from posts.models import Group, Post
+
+from .resources import (
+    COMMENTS, DEFAULT_LIMIT, FOLLOWS, GROUPS, MAX_LIMIT, POSTS
+)
+
+BATCH_LIMIT = 100
+
+
+def api_view(view, methods=('GET',)):
+    """Ответ сжимается gzip, ошибки — JSON с кодом.
+
+    view возвращает пару (статус, данные); ValueError даёт 400.
+    """
+    @wraps(view)
+    @gzip_page
+    @require_http_methods(methods)
+    def wrapper(request, *args, **kwargs):
+        try:
+            status, data = view(request, *args, **kwargs)
+        except ValueError as error:
+            status, data = 400, {'detail': str(error)}
+        return JsonResponse(
+            data,
+            status=status,
+            json_dumps_params={'ensure_ascii': False},
+        )
+    return wrapper
+
+
+def batch_view(view):
+    """POST со списком items в JSON от авторизованного пользователя."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return 401, {'detail': 'Нужна авторизация'}
+        try:
+            items = json.loads(request.body)['items']
+        except (ValueError, KeyError, TypeError):
+            raise ValueError('Ожидается JSON вида {"items": [...]}') from None
+        if not isinstance(items, list) or not items:
+            raise ValueError('items должен быть непустым списком')
+        if len(items) > BATCH_LIMIT:
+            raise ValueError(f'Не больше {BATCH_LIMIT} элементов за раз')
+        if not all(isinstance(item, dict) for item in items):
+            raise ValueError('Элементы items должны быть объектами')
+        return view(request, items, *args, **kwargs)
+    return api_view(wrapper, methods=('POST',))
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError('limit должен быть числом') from None
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _list(request, resource, queryset):
+    results, next_cursor = resource.page(
+        queryset,
+        resource.select(request.GET.get('fields')),
+        request.GET.get('cursor'),
+        _limit(request),
+    )
+    return 200, {'results': results, 'next': next_cursor}
+
+
+def _detail(request, resource, queryset):
+    names = resource.select(request.GET.get('fields'))
+    record = next(resource.serialize(queryset, names), None)
+    if record is None:
+        return 404, {'detail': 'Не найдено'}
+    return 200, record
+
+
+@api_view
+def post_list(request):
+    posts = POSTS.queryset
+    if request.GET.get('group'):
+        posts = posts.filter(group__slug=request.GET['group'])
+    if request.GET.get('author'):
+        posts = posts.filter(author__username=request.GET['author'])
+    return _list(request, POSTS, posts)
+
+
+@api_view
+def post_detail(request, post_id):
+    return _detail(request, POSTS, POSTS.queryset.filter(pk=post_id))
+
+
+@api_view
+def comment_list(request, post_id):
+    return _list(request, COMMENTS, COMMENTS.queryset.filter(post_id=post_id))
+
+
+@api_view
+def group_list(request):
+    return _list(request, GROUPS, GROUPS.queryset)
+
+
+@api_view
+def group_detail(request, slug):
+    return _detail(request, GROUPS, GROUPS.queryset.filter(slug=slug))
+
+
+@api_view
+def follow_list(request):
+    """Подписки текущего пользователя."""
+    if not request.user.is_authenticated:
+        return 401, {'detail': 'Нужна авторизация'}
+    return _list(
+        request, FOLLOWS, FOLLOWS.queryset.filter(user=request.user)
+    )
+
+
+def _ids(items, field):
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item[field]))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return ids
+
+
+def _batch_response(forms, created):
+    """Результат по каждому элементу в порядке запроса."""
+    results = []
+    objects = iter(created)
+    for index, form in enumerate(forms):
+        if form.errors:
+            results.append({'index': index, 'errors': form.errors})
+        else:
+            results.append({'index': index, 'id': next(objects).pk})
+    status = 201 if created else 400
+    return status, {'created': len(created), 'results': results}
+
+
+def _check_choice(form, field, value, choices):
+    """Проверяет ссылку по заранее загруженным choices без запроса."""
+    if value in (None, ''):
+        return None
+    try:
+        return choices[int(value)]
+    except (KeyError, TypeError, ValueError):
+        form.add_error(
+            field if field in form.fields else None,
+            f'{field}: объект {value} не найден',
+        )
+        return None
+
+
+@batch_view
+def post_batch(request, items):
+    groups = Group.objects.in_bulk(_ids(items, 'group'))
+    forms, posts = [], []
+    for item in items:
+        form = PostForm(data={'text': item.get('text')})
+        form.is_valid()
+        group = _check_choice(form, 'group', item.get('group'), groups)
+        if not form.errors:
+            post = form.save(commit=False)
+            post.group = group
+            posts.append(post)
+        forms.append(form)
+    return _batch_response(forms, create_posts(request.user, posts))
+
+
+@batch_view
+def comment_batch(request, items):
+    posts = Post.objects.only('pk').in_bulk(_ids(items, 'post'))
+    forms, comments = [], []
+    for item in items:
+        form = CommentForm(data={'text': item.get('text')})
+        form.is_valid()
+        post = _check_choice(form, 'post', item.get('post'), posts)
+        if post is None and not form.errors:
+            form.add_error(None, 'Не указан пост')
+        if not form.errors:
+            comment = form.save(commit=False)
+            comment.post = post
+            comments.append(comment)
+        forms.append(form)
+    return _batch_response(forms, create_comments(request.user, comments))
@@ -0,0 +1,34 @@
+"""SQLite с журналом WAL и настройками соединения для нагрузки.
+
+В режиме WAL читатели не ждут пишущую транзакцию: они видят последний
+зафиксированный снимок, пока запись идёт в отдельный журнал. Кроме
+обычных аргументов sqlite3.connect() в OPTIONS понимаются:
+
+    pragmas — PRAGMA поверх PRAGMAS, например {'mmap_size': 0};
+    read_only — соединение только для чтения (PRAGMA query_only).
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'wal',
+    # В WAL фиксация с synchronous=NORMAL не теряет целостность,
+    # а fsync делается только при checkpoint.
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        pragmas = {**PRAGMAS, **conn_params.pop('pragmas', {})}
+        read_only = conn_params.pop('read_only', False)
+        conn = super().get_new_connection(conn_params)
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        if read_only:
+            conn.execute('PRAGMA query_only = ON')
+        return conn
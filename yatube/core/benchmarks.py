@@ -0,0 +1,244 @@
+"""Замеры инфраструктуры: блокировки SQLite и разбор шаблонов.
+
+measure() гоняет одновременно пишущий процесс и несколько читающих на
+временной базе-файле: сначала со стандартным бэкендом Django (журнал
+отката), затем с core.backends.sqlite3 (WAL, отдельное соединение
+только для чтения) — и сравнивает задержки чтения.
+
+measure_render() сравнивает время отрисовки шаблона без кеширующего
+загрузчика, в первом запросе воркера с ним (cold) и после прогрева
+core.warmup (warm).
+"""
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Paginator
+from django.db.utils import ConnectionHandler, OperationalError
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory, override_settings
+
+from posts.models import Post, User
+
+from .warmup import compile_templates
+
+BACKENDS = {
+    'rollback': 'django.db.backends.sqlite3',
+    'wal': 'core.backends.sqlite3',
+}
+ROWS = 20000
+BATCH = 200
+READ_SQL = (
+    'SELECT id, author_id, text FROM bench_post '
+    'ORDER BY pub_date DESC LIMIT 10'
+)
+
+
+def _databases(engine, path):
+    # Читатель не ждёт блокировку, а сразу получает ошибку: так
+    # считается, сколько раз он упёрся бы в пишущую транзакцию.
+    reader_options = {'timeout': 0}
+    if engine == BACKENDS['wal']:
+        reader_options.update(read_only=True, pragmas={'busy_timeout': 0})
+    return {
+        'default': {'ENGINE': engine, 'NAME': path},
+        'reader': {
+            'ENGINE': engine, 'NAME': path, 'OPTIONS': reader_options,
+        },
+    }
+
+
+def _prepare(handler, rows):
+    cursor = handler['default'].cursor()
+    cursor.execute('BEGIN')
+    cursor.execute(
+        'CREATE TABLE bench_post (id INTEGER PRIMARY KEY, '
+        'author_id INTEGER, text TEXT, pub_date REAL)'
+    )
+    cursor.execute(
+        'CREATE INDEX bench_post_pub_date ON bench_post (pub_date)'
+    )
+    cursor.executemany(
+        'INSERT INTO bench_post (author_id, text, pub_date) '
+        'VALUES (%s, %s, %s)',
+        [(pk % 50, f'Текст поста {pk}' * 5, pk) for pk in range(rows)],
+    )
+    cursor.execute('COMMIT')
+
+
+def _write(databases, stop, batch, writes):
+    connection = ConnectionHandler(databases)['default']
+    cursor = connection.cursor()
+    stamp = ROWS
+    count = 0
+    while not stop.is_set():
+        cursor.execute('BEGIN')
+        for _ in range(batch):
+            stamp += 1
+            cursor.execute(
+                'INSERT INTO bench_post (author_id, text, pub_date) '
+                'VALUES (%s, %s, %s)',
+                (stamp % 50, f'Новый пост {stamp}' * 5, stamp),
+            )
+        cursor.execute('COMMIT')
+        count += 1
+    connection.close()
+    writes.put(count)
+
+
+def _read(databases, stop, results):
+    connection = ConnectionHandler(databases)['reader']
+    cursor = connection.cursor()
+    timings, blocked = [], 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            cursor.execute(READ_SQL)
+            cursor.fetchall()
+        except OperationalError:
+            blocked += 1
+            continue
+        timings.append((time.perf_counter() - started) * 1000)
+    connection.close()
+    results.put((timings, blocked))
+
+
+def run(engine, readers=4, duration=2.0, rows=ROWS, batch=BATCH,
+        directory=None):
+    """Задержки чтения (мс) под постоянной записью для engine.
+
+    Читатели и писатель — отдельные процессы, как воркеры сервера,
+    чтобы замер не искажала GIL.
+    """
+    directory = tempfile.mkdtemp(dir=directory)
+    databases = _databases(engine, os.path.join(directory, 'bench.sqlite3'))
+    context = multiprocessing.get_context('fork')
+    stop = context.Event()
+    writes, results = context.Queue(), context.Queue()
+    try:
+        handler = ConnectionHandler(databases)
+        _prepare(handler, rows)
+        handler['default'].close()
+        processes = [
+            context.Process(
+                target=_write, args=(databases, stop, batch, writes)
+            )
+        ] + [
+            context.Process(target=_read, args=(databases, stop, results))
+            for _ in range(readers)
+        ]
+        for process in processes:
+            process.start()
+        time.sleep(duration)
+        stop.set()
+        reads, blocked = [], 0
+        for _ in range(readers):
+            timings, count = results.get()
+            reads.extend(timings)
+            blocked += count
+        writes = writes.get()
+        for process in processes:
+            process.join()
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+    summary = {'reads': len(reads), 'writes': writes, 'blocked': blocked}
+    if len(reads) > 1:
+        percentiles = statistics.quantiles(reads, n=100)
+        summary.update(
+            p50_ms=round(statistics.median(reads), 3),
+            p95_ms=round(percentiles[94], 3),
+            p99_ms=round(percentiles[98], 3),
+            max_ms=round(max(reads), 2),
+        )
+    return summary
+
+
+def measure(readers=4, duration=2.0, rows=ROWS, batch=BATCH,
+            directory=None):
+    """Отчёт run() для каждого из BACKENDS."""
+    return {
+        name: run(engine, readers, duration, rows, batch, directory)
+        for name, engine in BACKENDS.items()
+    }
+
+
+RENDER_TEMPLATE = 'posts/index.html'
+RENDER_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def _template_backend(cached):
+    """Новый движок с настройками проекта и пустым кешем шаблонов."""
+    params = {
+        key: value for key, value in settings.TEMPLATES[0].items()
+        if key != 'BACKEND'
+    }
+    loaders = [('django.template.loaders.cached.Loader', LOADERS)]
+    return DjangoTemplates({
+        **params,
+        'NAME': 'benchmark',
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **params['OPTIONS'],
+            'loaders': loaders if cached else LOADERS,
+        },
+    })
+
+
+def _render_context():
+    author = User(id=1, username='author')
+    posts = [
+        Post(id=pk, author=author, text=f'Пост {pk}', pub_date=None)
+        for pk in range(1, 11)
+    ]
+    return {'page_obj': Paginator(posts, 10).page(1), 'feed_version': 0}
+
+
+def _render_ms(backend, name, request):
+    context = _render_context()
+    started = time.perf_counter()
+    backend.get_template(name).render(context, request)
+    return (time.perf_counter() - started) * 1000
+
+
+def measure_render(name=RENDER_TEMPLATE, runs=20):
+    """p50/p95 отрисовки name (мс): uncached, cold и warm.
+
+    На время замера кеш подменяется DummyCache: фрагмент ленты и
+    карточки post_cards рендерятся в каждом прогоне, а карточки
+    ненастоящих постов не попадают в рабочий кеш.
+    """
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    uncached = _template_backend(cached=False)
+    warm = _template_backend(cached=True)
+    compile_templates(warm.engine)
+    with override_settings(CACHES=RENDER_CACHES):
+        timings = {
+            'uncached': [
+                _render_ms(uncached, name, request) for _ in range(runs)
+            ],
+            'cold': [
+                _render_ms(_template_backend(cached=True), name, request)
+                for _ in range(runs)
+            ],
+            'warm': [_render_ms(warm, name, request) for _ in range(runs)],
+        }
+    return {
+        mode: {
+            'p50_ms': round(statistics.median(values), 3),
+            'p95_ms': round(statistics.quantiles(values, n=20)[-1], 3),
+        }
+        for mode, values in timings.items()
+    }
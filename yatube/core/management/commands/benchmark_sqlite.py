@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает, как запись задерживает чтение SQLite со стандартным '
+        'бэкендом и с core.backends.sqlite3 (WAL)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Число читающих процессов',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=2.0,
+            help='Длительность замера для каждого бэкенда, с',
+        )
+        parser.add_argument(
+            '--rows', type=int, default=benchmarks.ROWS,
+            help='Строк в таблице перед замером',
+        )
+        parser.add_argument(
+            '--batch', type=int, default=benchmarks.BATCH,
+            help='Вставок в одной пишущей транзакции',
+        )
+        parser.add_argument(
+            '--dir', dest='directory',
+            help='Каталог для временной базы (по умолчанию системный)',
+        )
+        parser.add_argument('--report', help='Куда записать JSON-отчёт')
+
+    def handle(self, *args, **options):
+        report = benchmarks.measure(
+            options['readers'], options['duration'], options['rows'],
+            options['batch'], options['directory'],
+        )
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        for name, metrics in report.items():
+            # Без успешных чтений процентилей нет.
+            metrics = {'p50_ms': float('nan'), 'p99_ms': float('nan'),
+                       **metrics}
+            self.stdout.write(
+                f'{name:9} чтений {metrics["reads"]:>7}, '
+                f'заблокировано {metrics["blocked"]:>7}, '
+                f'транзакций записи {metrics["writes"]:>5}, '
+                f'p50 {metrics["p50_ms"]:6.3f} мс, '
+                f'p99 {metrics["p99_ms"]:7.3f} мс'
+            )
+        if report['wal']['blocked']:
+            raise CommandError(
+                'Читатели WAL упирались в запись '
+                f'{report["wal"]["blocked"]} раз'
+            )
+        self.stdout.write(self.style.SUCCESS('Чтение не ждёт записи'))
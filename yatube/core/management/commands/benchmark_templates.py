@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время отрисовки шаблона без кеширующего загрузчика, '
+        'в первом запросе воркера и после прогрева'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--template', default=benchmarks.RENDER_TEMPLATE,
+            help='Имя шаблона',
+        )
+        parser.add_argument(
+            '--runs', type=int, default=20,
+            help='Повторов для каждого режима',
+        )
+        parser.add_argument('--report', help='Куда записать JSON-отчёт')
+
+    def handle(self, *args, **options):
+        report = benchmarks.measure_render(
+            options['template'], options['runs']
+        )
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        for mode, metrics in report.items():
+            self.stdout.write(
+                f'{mode:9} p50 {metrics["p50_ms"]:7.2f} мс, '
+                f'p95 {metrics["p95_ms"]:7.2f} мс'
+            )
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.replication import replicate
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в реплики DATABASE_REPLICAS — '
+        'замена репликации для локальной проверки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять копирование каждые N секунд',
+        )
+
+    def handle(self, *args, **options):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if not replicas:
+            raise CommandError('DATABASE_REPLICAS пуст')
+        databases = [connections[alias] for alias in ('default', *replicas)]
+        if any(db.vendor != 'sqlite' for db in databases):
+            raise CommandError('Поддерживается только SQLite')
+        source, *targets = [db.settings_dict['NAME'] for db in databases]
+        while True:
+            replicate(source, targets)
+            self.stdout.write(f'{source} -> {", ".join(targets)}')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,198 @@
+"""Замер времени запросов к БД, рендеринга шаблонов и view.
+
+ServerTimingMiddleware работает без DEBUG и debug_toolbar: запросы к БД
+считает execute_wrapper, рендеринг — обёртка Template.render шаблонного
+бэкенда Django. Вложенные рендеры (карточки post_cards внутри страницы)
+уже входят во время внешнего и отдельно не считаются. Результат уходит
+в заголовок Server-Timing, в лог yatube.timing попадает доля
+TIMING_SAMPLE_RATE запросов, а раз в TIMING_FLUSH_INTERVAL секунд —
+сводка по именам URL.
+
+PrimaryPinMiddleware ведёт состояние core.routers.ReplicaRouter.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template
+
+from . import routers
+
+logger = logging.getLogger('yatube.timing')
+
+SAMPLE_RATE = 0.01
+FLUSH_INTERVAL = 60
+
+_local = threading.local()
+_lock = threading.Lock()
+_totals = {}
+_flushed_at = time.monotonic()
+
+
+class Metrics:
+    __slots__ = (
+        'started', 'view_started', 'queries', 'db', 'template', 'depth'
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+_render = Template.render
+
+
+def _timed_render(self, context=None, request=None):
+    metrics = getattr(_local, 'metrics', None)
+    if metrics is None or metrics.depth:
+        return _render(self, context, request)
+    metrics.depth += 1
+    started = time.perf_counter()
+    try:
+        return _render(self, context, request)
+    finally:
+        metrics.template += time.perf_counter() - started
+        metrics.depth -= 1
+
+
+def install():
+    """Подключает замер рендеринга; вызывается из CoreConfig.ready().
+
+    Template.render подменяется только вместе с ServerTimingMiddleware
+    в MIDDLEWARE.
+    """
+    if f'{__name__}.ServerTimingMiddleware' in settings.MIDDLEWARE:
+        Template.render = _timed_render
+
+
+def _aggregate(name, timings, queries):
+    """Копит сводку по name и раз в FLUSH_INTERVAL пишет её в лог."""
+    global _flushed_at
+    interval = getattr(settings, 'TIMING_FLUSH_INTERVAL', FLUSH_INTERVAL)
+    with _lock:
+        total = _totals.setdefault(
+            name, {'count': 0, 'queries': 0, 'max_ms': 0.0,
+                   **{key: 0.0 for key in timings}}
+        )
+        total['count'] += 1
+        total['queries'] += queries
+        total['max_ms'] = max(total['max_ms'], timings['total'])
+        for key, value in timings.items():
+            total[key] += value
+        now = time.monotonic()
+        if now - _flushed_at < interval:
+            return
+        summary = dict(_totals)
+        _totals.clear()
+        _flushed_at = now
+    for view, total in sorted(summary.items()):
+        count = total.pop('count')
+        logger.info(json.dumps({
+            'event': 'timing_summary',
+            'view': view,
+            'count': count,
+            'max_ms': round(total.pop('max_ms'), 2),
+            **{
+                f'avg_{key}' + ('' if key == 'queries' else '_ms'):
+                    round(value / count, 2)
+                for key, value in total.items()
+            },
+        }))
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = _local.metrics = Metrics()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        finished = time.perf_counter()
+        timings = {
+            'db': metrics.db * 1000,
+            'tpl': metrics.template * 1000,
+            'view': (
+                (finished - metrics.view_started) * 1000
+                if metrics.view_started is not None else 0.0
+            ),
+            'total': (finished - metrics.started) * 1000,
+        }
+        response['Server-Timing'] = ', '.join(
+            f'{key};dur={value:.1f}'
+            + (f';desc="{metrics.queries} queries"' if key == 'db' else '')
+            for key, value in timings.items()
+        )
+        match = request.resolver_match
+        name = match.view_name if match else 'unresolved'
+        sample_rate = getattr(settings, 'TIMING_SAMPLE_RATE', SAMPLE_RATE)
+        if random.random() < sample_rate:
+            logger.info(json.dumps({
+                'event': 'timing',
+                'view': name,
+                'method': request.method,
+                'status': response.status_code,
+                'queries': metrics.queries,
+                **{f'{key}_ms': round(value, 2)
+                   for key, value in timings.items()},
+            }))
+        _aggregate(name, timings, metrics.queries)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(_local, 'metrics', None)
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+
+
+class PrimaryPinMiddleware:
+    """После записи ставит cookie, которая временно отключает реплики."""
+
+    cookie_name = 'primary_until'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            until = float(request.COOKIES.get(self.cookie_name, 0))
+        except ValueError:
+            until = 0
+        routers.start_request(pinned=until > time.time())
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.finish_request()
+        if wrote:
+            seconds = getattr(
+                settings, 'REPLICA_PIN_SECONDS', routers.PIN_SECONDS
+            )
+            response.set_cookie(
+                self.cookie_name, str(time.time() + seconds),
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,16 @@
+"""Замена репликации для локальной проверки ReplicaRouter.
+
+replicate() копирует файл SQLite основной базы в файлы реплик через
+backup API: копия согласованна даже при идущей записи, а открытые
+соединения реплик видят новые данные без переподключения.
+"""
+import sqlite3
+from contextlib import closing
+
+
+def replicate(source, targets):
+    """Копирует базу source в каждый из файлов targets."""
+    with closing(sqlite3.connect(source)) as primary:
+        for target in targets:
+            with closing(sqlite3.connect(target)) as replica:
+                primary.backup(replica)
@@ -0,0 +1,131 @@
+"""Роутеры баз данных.
+
+ReplicaRouter читает посты, группы, комментарии и подписки с реплик
+DATABASE_REPLICAS по кругу, пропуская недоступные. Пользователь,
+только что изменивший эти модели, ещё REPLICA_PIN_SECONDS читает
+с основной базы (см. core.middleware.PrimaryPinMiddleware), чтобы
+увидеть свои изменения до того, как они дойдут до реплик.
+
+pin_primary() переводит на основную базу остаток текущего запроса:
+так posts.feed_cache заполняет кеш нового поколения ленты, пока
+отстающая реплика могла бы отдать старые данные.
+"""
+import itertools
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+REPLICATED_MODELS = {'posts.post', 'posts.group', 'posts.comment',
+                     'posts.follow'}
+PIN_SECONDS = 5
+HEALTH_INTERVAL = 10
+# Реплика без схемы (например, ещё не скопированная) тоже недоступна.
+HEALTH_SQL = 'SELECT 1 FROM django_migrations LIMIT 1'
+
+_state = threading.local()
+_health = {}
+_turn = itertools.count()
+
+
+def start_request(pinned=False):
+    """Начало запроса: pinned — читать только с основной базы."""
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def pin_primary():
+    """До конца запроса читать только с основной базы."""
+    _state.pinned = True
+
+
+def finish_request():
+    """Конец запроса; True, если в нём менялись реплицируемые модели."""
+    wrote = getattr(_state, 'wrote', False)
+    _state.pinned = _state.wrote = False
+    return wrote
+
+
+def is_healthy(alias):
+    """Доступна ли реплика; результат проверки живёт HEALTH_INTERVAL."""
+    interval = getattr(settings, 'REPLICA_HEALTH_INTERVAL', HEALTH_INTERVAL)
+    now = time.monotonic()
+    healthy, checked = _health.get(alias, (False, None))
+    if checked is not None and now - checked < interval:
+        return healthy
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(HEALTH_SQL)
+        healthy = True
+    except DatabaseError:
+        connection.close()
+        healthy = False
+    _health[alias] = (healthy, now)
+    return healthy
+
+
+class ReplicaRouter:
+    """Чтение REPLICATED_MODELS — с реплик, запись — в default."""
+
+    write_db = 'default'
+
+    def _replicated(self, model):
+        return model._meta.label_lower in REPLICATED_MODELS
+
+    def _primary(self):
+        return (
+            getattr(_state, 'pinned', False)
+            or getattr(_state, 'wrote', False)
+            or connections[self.write_db].in_atomic_block
+        )
+
+    def db_for_read(self, model, **hints):
+        if not self._replicated(model) or self._primary():
+            return None
+        replicas = [
+            alias for alias in getattr(settings, 'DATABASE_REPLICAS', ())
+            if is_healthy(alias)
+        ]
+        if not replicas:
+            return None
+        return replicas[next(_turn) % len(replicas)]
+
+    def db_for_write(self, model, **hints):
+        if self._replicated(model):
+            _state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'DATABASE_REPLICAS', ()):
+            return False
+        return None
+
+
+class ReadWriteRouter:
+    """Чтение — через отдельное соединение, запись — через default.
+
+    Внутри транзакции default чтение идёт туда же: другое соединение
+    не видит её незафиксированных изменений.
+    """
+
+    write_db = 'default'
+    read_db = 'reader'
+
+    def db_for_read(self, model, **hints):
+        if connections[self.write_db].in_atomic_block:
+            return self.write_db
+        return self.read_db
+
+    def db_for_write(self, model, **hints):
+        return self.write_db
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == self.write_db
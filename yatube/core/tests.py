@@ -0,0 +1,426 @@
+import importlib
+import itertools
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from contextlib import closing
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.utils import ConnectionHandler, OperationalError
+from django.template import Engine, engines
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import benchmarks, middleware, routers, warmup
+from core.replication import replicate
+from core.routers import ReadWriteRouter, ReplicaRouter
+from posts.feed_cache import bump_generation, feed_generation
+from posts.models import Group, Post
+from posts.templatetags.post_cards import CARD_TEMPLATE
+
+User = get_user_model()
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=author, text='Текст')
+
+    def setUp(self):
+        middleware._totals.clear()
+
+    def timings(self, response):
+        return {
+            key: float(value) for key, value in re.findall(
+                r'(\w+);dur=([\d.]+)', response['Server-Timing']
+            )
+        }
+
+    def test_server_timing_header(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(url)
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'db', 'tpl', 'view', 'total'})
+        self.assertGreater(timings['tpl'], 0)
+        self.assertLessEqual(timings['view'], timings['total'])
+        queries = int(re.search(
+            r'db;dur=[\d.]+;desc="(\d+) queries"', response['Server-Timing']
+        ).group(1))
+        self.assertGreater(queries, 0)
+
+    @override_settings(TIMING_FLUSH_INTERVAL=0)
+    def test_sampled_log_and_summary(self):
+        with self.assertLogs('yatube.timing', 'INFO') as logs:
+            with self.settings(TIMING_SAMPLE_RATE=1):
+                self.client.get(reverse('posts:index'))
+        events = [
+            json.loads(line.split(':', 2)[2]) for line in logs.output
+        ]
+        self.assertEqual(
+            {event['event'] for event in events},
+            {'timing', 'timing_summary'},
+        )
+        self.assertTrue(all(
+            event['view'] == 'posts:index' for event in events
+        ))
+        summary = next(
+            event for event in events if event['event'] == 'timing_summary'
+        )
+        self.assertEqual(summary['count'], 1)
+        self.assertIn('avg_db_ms', summary)
+
+    def test_nested_renders_are_counted_once(self):
+        def render(template, context=None, request=None):
+            if template == 'outer.html':
+                middleware._timed_render('inner.html')
+            return template
+
+        metrics = middleware._local.metrics = middleware.Metrics()
+        try:
+            clock = mock.patch.object(
+                middleware.time, 'perf_counter', side_effect=itertools.count()
+            )
+            with mock.patch.object(middleware, '_render', render), clock:
+                middleware._timed_render('outer.html')
+        finally:
+            middleware._local.metrics = None
+        self.assertEqual(metrics.template, 1)
+        self.assertEqual(metrics.depth, 0)
+
+    def test_install_requires_middleware(self):
+        with mock.patch.object(
+            middleware.Template, 'render', middleware._render
+        ):
+            with self.settings(MIDDLEWARE=[]):
+                middleware.install()
+                self.assertIs(
+                    middleware.Template.render, middleware._render
+                )
+            middleware.install()
+            self.assertIs(
+                middleware.Template.render, middleware._timed_render
+            )
+
+
+class SettingsProfileTests(TestCase):
+    def load(self, env):
+        import yatube.settings as package
+        for profile in ('dev', 'prod'):
+            sys.modules.pop(f'{package.__name__}.{profile}', None)
+        with mock.patch.dict(os.environ, env):
+            return importlib.reload(package)
+
+    def tearDown(self):
+        self.load({})
+
+    def test_dev_profile(self):
+        profile = self.load({'YATUBE_ENV': 'dev'})
+        self.assertTrue(profile.DEBUG)
+        self.assertIn('debug_toolbar', profile.INSTALLED_APPS)
+        self.assertIn(
+            'debug_toolbar.middleware.DebugToolbarMiddleware',
+            profile.MIDDLEWARE,
+        )
+        self.assertFalse(
+            profile.THUMBNAIL_SQLITE_FILE.startswith(profile.BASE_DIR)
+        )
+
+    def test_prod_profile(self):
+        profile = self.load({
+            'YATUBE_ENV': 'prod',
+            'DJANGO_SECRET_KEY': 'secret',
+            'MEMCACHED_LOCATION': '127.0.0.1:11211',
+        })
+        self.assertFalse(profile.DEBUG)
+        self.assertEqual(profile.SECRET_KEY, 'secret')
+        self.assertNotIn('debug_toolbar', profile.INSTALLED_APPS)
+        self.assertFalse(
+            any('debug_toolbar' in name for name in profile.MIDDLEWARE)
+        )
+        options = profile.TEMPLATES[0]['OPTIONS']
+        self.assertEqual(
+            options['loaders'][0][0], 'django.template.loaders.cached.Loader'
+        )
+        self.assertGreater(profile.DATABASES['default']['CONN_MAX_AGE'], 0)
+        self.assertIn('memcached', profile.CACHES['default']['BACKEND'])
+        self.assertIn('Manifest', profile.STATICFILES_STORAGE)
+
+    def test_prod_cache_requires_explicit_choice(self):
+        env = {'YATUBE_ENV': 'prod', 'DJANGO_SECRET_KEY': 'secret'}
+        with self.assertRaises(ImproperlyConfigured):
+            self.load(env)
+        profile = self.load({**env, 'DJANGO_CACHE_DIR': '/tmp/yatube'})
+        self.assertIn('filebased', profile.CACHES['default']['BACKEND'])
+
+
+class SqliteBackendTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'db.sqlite3')
+        self.handler = ConnectionHandler({
+            'default': {'ENGINE': 'core.backends.sqlite3', 'NAME': path},
+            'reader': {
+                'ENGINE': 'core.backends.sqlite3', 'NAME': path,
+                'OPTIONS': {
+                    'read_only': True, 'pragmas': {'cache_size': -1024},
+                },
+            },
+        })
+        self.addCleanup(self.handler.close_all)
+
+    def pragma(self, alias, name):
+        with self.handler[alias].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        self.assertEqual(self.pragma('default', 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma('default', 'synchronous'), 1)
+        self.assertEqual(self.pragma('default', 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma('default', 'query_only'), 0)
+        self.assertEqual(self.pragma('reader', 'cache_size'), -1024)
+        self.assertEqual(self.pragma('reader', 'query_only'), 1)
+
+    def test_reader_sees_commits_and_cannot_write(self):
+        with self.handler['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+            cursor.execute('INSERT INTO item VALUES (1)')
+        with self.handler['reader'].cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            with self.assertRaises(OperationalError):
+                cursor.execute('INSERT INTO item VALUES (2)')
+
+
+class ReadWriteRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReadWriteRouter()
+
+    def test_reads_go_to_reader(self):
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('reader', 'posts'))
+        # TestCase держит default в транзакции; без неё чтение — из reader.
+        with mock.patch.object(connection, 'in_atomic_block', False):
+            self.assertEqual(self.router.db_for_read(Post), 'reader')
+
+    def test_reads_inside_transaction_stay_on_default(self):
+        with transaction.atomic():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+class SqliteConcurrencyBenchmarkTests(SimpleTestCase):
+    def test_wal_readers_are_not_blocked(self):
+        report = benchmarks.measure(
+            readers=2, duration=0.3, rows=200, batch=20
+        )
+        self.assertEqual(set(report), set(benchmarks.BACKENDS))
+        self.assertEqual(report['wal']['blocked'], 0)
+        self.assertGreater(report['wal']['reads'], 0)
+        self.assertGreater(report['wal']['writes'], 0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        healthy = mock.patch.object(routers, 'is_healthy', return_value=True)
+        self.is_healthy = healthy.start()
+        self.addCleanup(healthy.stop)
+        # TestCase держит default в транзакции, а вне её чтение
+        # должно уходить на реплики.
+        atomic = mock.patch.object(connection, 'in_atomic_block', False)
+        atomic.start()
+        self.addCleanup(atomic.stop)
+        routers.start_request()
+        self.addCleanup(routers.finish_request)
+
+    def reads(self, model=Post, count=4):
+        return [self.router.db_for_read(model) for _ in range(count)]
+
+    def test_round_robin(self):
+        self.assertCountEqual(
+            self.reads(), ['replica1', 'replica2', 'replica1', 'replica2']
+        )
+        self.assertEqual(set(self.reads(Group, 2)), {'replica1', 'replica2'})
+
+    def test_other_models_use_default_routing(self):
+        self.assertEqual(self.reads(User, 1), [None])
+
+    def test_unhealthy_replicas_are_skipped(self):
+        self.is_healthy.side_effect = lambda alias: alias == 'replica2'
+        self.assertEqual(set(self.reads()), {'replica2'})
+        self.is_healthy.side_effect = lambda alias: False
+        self.assertEqual(set(self.reads()), {None})
+
+    def test_reads_after_write_go_to_primary(self):
+        self.assertIsNone(self.router.db_for_write(Post))
+        self.assertEqual(set(self.reads()), {None})
+        self.assertTrue(routers.finish_request())
+        self.assertEqual(set(self.reads(count=2)), {'replica1', 'replica2'})
+
+    def test_pinned_request_uses_primary(self):
+        routers.start_request(pinned=True)
+        self.assertEqual(set(self.reads()), {None})
+
+    def test_feed_fill_after_bump_uses_primary(self):
+        caches['default'].clear()
+        feed_generation('index')
+        self.assertEqual(set(self.reads(count=2)), {'replica1', 'replica2'})
+        bump_generation('index')
+        routers.start_request()
+        feed_generation('group')
+        self.assertEqual(set(self.reads(count=2)), {'replica1', 'replica2'})
+        feed_generation('index')
+        self.assertEqual(set(self.reads()), {None})
+
+    @override_settings(REPLICA_PIN_SECONDS=0)
+    def test_feed_pin_expires(self):
+        caches['default'].clear()
+        bump_generation()
+        feed_generation('index')
+        self.assertEqual(set(self.reads(count=2)), {'replica1', 'replica2'})
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+        self.assertIsNone(self.router.allow_migrate('default', 'posts'))
+
+
+class ReplicaHealthTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.paths = [
+            os.path.join(directory.name, f'{name}.sqlite3')
+            for name in ('primary', 'replica1', 'replica2')
+        ]
+        with closing(sqlite3.connect(self.paths[0])) as primary:
+            primary.execute('CREATE TABLE django_migrations (id INTEGER)')
+            primary.execute('CREATE TABLE item (id INTEGER)')
+            primary.execute('INSERT INTO item VALUES (1)')
+            primary.commit()
+        self.handler = ConnectionHandler({
+            alias: {'ENGINE': 'core.backends.sqlite3', 'NAME': path}
+            for alias, path in zip(
+                ('default', 'replica1', 'replica2'), self.paths
+            )
+        })
+        self.addCleanup(self.handler.close_all)
+        for patcher in (
+            mock.patch.object(routers, 'connections', self.handler),
+            mock.patch.dict(routers._health, clear=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_replicate_and_health(self):
+        replicate(self.paths[0], self.paths[1:2])
+        self.assertTrue(routers.is_healthy('replica1'))
+        self.assertFalse(routers.is_healthy('replica2'))
+        with self.handler['replica1'].cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    @override_settings(REPLICA_HEALTH_INTERVAL=60)
+    def test_health_is_cached(self):
+        self.assertFalse(routers.is_healthy('replica2'))
+        replicate(self.paths[0], self.paths[2:])
+        self.assertFalse(routers.is_healthy('replica2'))
+        routers._health.clear()
+        self.assertTrue(routers.is_healthy('replica2'))
+
+
+class PrimaryPinMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_write_sets_pin_cookie(self):
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        cookie = response.cookies['primary_until']
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertGreater(float(cookie.value), 0)
+
+    def test_read_does_not_set_cookie(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('primary_until', response.cookies)
+
+    def test_cookie_pins_request(self):
+        calls = []
+        with mock.patch.object(
+            routers, 'start_request',
+            side_effect=lambda pinned=False: calls.append(pinned),
+        ):
+            self.client.cookies['primary_until'] = '9999999999'
+            self.client.get(reverse('posts:index'))
+            self.client.cookies['primary_until'] = '1'
+            self.client.get(reverse('posts:index'))
+        self.assertEqual(calls, [True, False])
+
+
+class TemplateWarmUpTests(SimpleTestCase):
+    def cached_templates(self):
+        params = {**settings.TEMPLATES[0], 'APP_DIRS': False}
+        params['OPTIONS'] = {
+            **params['OPTIONS'],
+            'loaders': [('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ])],
+        }
+        return override_settings(TEMPLATES=[params])
+
+    def test_without_cached_loader_does_nothing(self):
+        with override_settings(TEMPLATES=[
+            {**settings.TEMPLATES[0], 'OPTIONS': {
+                **settings.TEMPLATES[0]['OPTIONS'], 'debug': True,
+            }},
+        ]):
+            self.assertEqual(warmup.warm_up(), 0)
+
+    def test_compiles_project_templates(self):
+        directory = settings.TEMPLATES[0]['DIRS'][0]
+        names = set(warmup.template_names(directory))
+        self.assertIn('base.html', names)
+        self.assertIn('includes/paginator.html', names)
+        with self.cached_templates():
+            self.assertEqual(warmup.warm_up(), len(names))
+            loader = engines['django'].engine.template_loaders[0]
+            self.assertIn('posts/index.html', loader.get_template_cache)
+
+    def test_measure_render(self):
+        live_cache = caches['default']
+        with mock.patch.object(
+            Engine, 'get_template', autospec=True,
+            side_effect=Engine.get_template,
+        ) as get_template, mock.patch.object(
+            live_cache, 'set_many', wraps=live_cache.set_many
+        ) as set_many:
+            report = benchmarks.measure_render(runs=2)
+        self.assertEqual(set(report), {'uncached', 'cold', 'warm'})
+        self.assertGreater(report['warm']['p50_ms'], 0)
+        # Карточка загружается при прогреве и в каждом из шести прогонов
+        # движком замера и не попадает в рабочий кеш.
+        engines_used = [
+            engine for engine, name in (
+                call[0] for call in get_template.call_args_list
+            ) if name == CARD_TEMPLATE
+        ]
+        self.assertEqual(len(engines_used), 7)
+        self.assertNotIn(engines['django'].engine, engines_used)
+        set_many.assert_not_called()
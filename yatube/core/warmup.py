@@ -0,0 +1,53 @@
+"""Прогрев кеша шаблонов при старте воркера.
+
+С кеширующим загрузчиком каждый шаблон разбирается один раз на
+процесс, но по умолчанию это происходит в первом запросе, который его
+использует. warm_up() компилирует заранее все шаблоны из DIRS
+(каталог templates/ проекта), и первый запрос воркера уже не платит
+за разбор base.html, includes/* и страниц.
+"""
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(directory):
+    """Имена всех шаблонов в directory относительно него."""
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), directory)
+            yield path.replace(os.sep, '/')
+
+
+def compile_templates(engine):
+    """Загружает шаблоны из engine.dirs; возвращает их число."""
+    count = 0
+    for directory in engine.dirs:
+        for name in sorted(template_names(directory)):
+            try:
+                engine.get_template(name)
+            except TemplateSyntaxError:
+                logger.exception('Шаблон %s не компилируется', name)
+                continue
+            count += 1
+    return count
+
+
+def warm_up():
+    """Прогревает движки с кеширующим загрузчиком; без него — ничего."""
+    count = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        if any(
+            isinstance(loader, CachedLoader)
+            for loader in engine.template_loaders
+        ):
+            count += compile_templates(engine)
+    return count
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Post, Group, Comment, Follow
+from .models import Post, Group, Comment, Follow, AuthorStats
+from .search import filter_matching
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,11 +10,30 @@ class PostAdmin(admin.ModelAdmin):
     list_editable = ('group',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return filter_matching(queryset, search_term), False
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post',)
+    search_fields = ('text',)
+    list_filter = ('created',)
+    empty_value_display = '-пусто-'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return filter_matching(queryset, search_term), False
+
 
 admin.site.register(Post, PostAdmin)
 
 admin.site.register(Group)
 
-admin.site.register(Comment)
+admin.site.register(Comment, CommentAdmin)
 
 admin.site.register(Follow)
+
+admin.site.register(AuthorStats)
@@ -0,0 +1,77 @@
+"""Пакетное создание постов и комментариев.
+
+bulk_create не отправляет сигналы, поэтому здесь же за один проход
+делается то, что для одиночного save() делают обработчики из
+posts.signals: термы, поисковый индекс, счётчики, ленты подписок.
+"""
+from collections import Counter
+
+from django.db import connections, router, transaction
+
+from .counts import bump, feed_key
+from .feed_cache import bump_generation
+from .models import Comment, Post
+from .search import get_index
+from .stats import shift_author_stats, shift_comments_count
+from .text import token_string
+from .timelines import push_posts
+
+
+def _fill_ids(model, objects, **filters):
+    """Проставляет id, если база не возвращает их из bulk_create.
+
+    Вызывается в той же транзакции сразу после вставки: в SQLite
+    запись блокирует всю базу, так что последние len(objects) строк
+    с этими filters — только что вставленные.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_ids_from_bulk_insert:
+        return
+    ids = list(
+        model.objects.filter(**filters)
+        .order_by('-pk')
+        .values_list('pk', flat=True)[:len(objects)]
+    )
+    for obj, pk in zip(objects, reversed(ids)):
+        obj.pk = pk
+
+
+def create_posts(author, posts):
+    """Сохраняет новые посты author одной вставкой."""
+    if not posts:
+        return posts
+    with transaction.atomic():
+        for post in posts:
+            post.author = author
+            post.tokens = token_string(post.text)
+        Post.objects.bulk_create(posts)
+        _fill_ids(Post, posts, author=author)
+        get_index().add(posts)
+        shift_author_stats(author.pk, 'posts_count', len(posts))
+    feeds = Counter({feed_key('index'): len(posts)})
+    feeds[feed_key('author', author.pk)] += len(posts)
+    for post in posts:
+        if post.group_id is not None:
+            feeds[feed_key('group', post.group_id)] += 1
+    for key, delta in feeds.items():
+        bump(key, delta)
+    push_posts(author.pk, posts)
+    bump_generation()
+    return posts
+
+
+def create_comments(author, comments):
+    """Сохраняет новые комментарии author одной вставкой."""
+    if not comments:
+        return comments
+    with transaction.atomic():
+        for comment in comments:
+            comment.author = author
+            comment.tokens = token_string(comment.text)
+        Comment.objects.bulk_create(comments)
+        _fill_ids(Comment, comments, author=author)
+        get_index(Comment).add(comments)
+        per_post = Counter(comment.post_id for comment in comments)
+        for post_id, delta in per_post.items():
+            shift_comments_count(post_id, delta)
+    return comments
@@ -0,0 +1,272 @@
+"""Бюджеты запросов и времени ответа для страниц posts.
+
+seed() наполняет базу синтетическими данными заданного объёма через
+posts.transfer.Importer, measure() обходит страницы тестовым клиентом
+и собирает число запросов, p50/p95 времени ответа и пик памяти, а
+check() сравнивает результат с BUDGETS. Команда benchmark_views делает
+всё это на отдельной тестовой базе и пишет JSON-отчёт.
+
+explain() получает планы SQLite для запросов тех же страниц, а
+plan_problems() находит в них полные просмотры таблиц и сортировки
+во временном B-дереве; это проверяет команда check_query_plans.
+
+Всё это работает с отдельным LocMemCache (CACHES): замеры чистят кеш,
+а ключи лент и счётчиков с id тестовой базы не должны попасть в
+рабочий кеш.
+"""
+import random
+import re
+import statistics
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Follow, Post
+from .transfer import Importer
+
+VOLUMES = {
+    'users': 50,
+    'groups': 5,
+    'posts': 1000,
+    'comments': 2000,
+    'follows': 200,
+}
+# queries — для повторного запроса с прогретым кешем,
+# cold_queries — для первого запроса после очистки кеша.
+BUDGETS = {
+    'index': {'queries': 3, 'cold_queries': 5, 'p95_ms': 100},
+    'group_posts': {'queries': 4, 'cold_queries': 5, 'p95_ms': 100},
+    'profile': {'queries': 5, 'cold_queries': 6, 'p95_ms': 100},
+    'post_detail': {'queries': 5, 'cold_queries': 5, 'p95_ms': 100},
+    'follow_index': {'queries': 3, 'cold_queries': 5, 'p95_ms': 100},
+    'post_create': {'queries': 7, 'cold_queries': 8, 'p95_ms': 100},
+    'add_comment': {'queries': 6, 'cold_queries': 6, 'p95_ms': 100},
+}
+# Полный просмотр таблицы: SCAN без индекса ("SCAN TABLE t" в старых
+# версиях SQLite, "SCAN t" в новых) и сортировка во временном B-дереве.
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?!sqlite_)\w+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+# Допустимые строки плана: (страница, фрагмент SQL, фрагмент плана).
+# Сборка ленты подписок сливает посты нескольких авторов, поэтому без
+# сортировки не обойтись; собранная лента дальше берётся из кеша.
+ALLOWED_PLANS = (
+    ('follow_index', 'INNER JOIN "posts_follow"', 'TEMP B-TREE FOR ORDER BY'),
+)
+WORDS = (
+    'кот собака город река лес дом утро вечер книга дорога море солнце '
+    'новый старый быстро медленно читать писать думать гулять'
+).split()
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'posts-benchmarks',
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+def seed(volumes=None, seed=0):
+    """Создаёт данные объёма volumes; возвращает число записей."""
+    volumes = {**VOLUMES, **(volumes or {})}
+    rng = random.Random(seed)
+    users = [f'user{i}' for i in range(max(volumes['users'], 2))]
+    groups = [f'group{i}' for i in range(volumes['groups'])]
+    now = timezone.now()
+
+    def text():
+        return ' '.join(rng.choices(WORDS, k=rng.randint(5, 40)))
+
+    def records():
+        for slug in groups:
+            yield {
+                'type': 'group', 'slug': slug, 'title': slug,
+                'description': text(),
+            }
+        for pk in range(1, volumes['posts'] + 1):
+            yield {
+                'type': 'post', 'id': pk,
+                # user0 — читатель, остальные пишут.
+                'author': rng.choice(users[1:]),
+                'group': rng.choice(groups + [None]) if groups else None,
+                'text': text(),
+                'pub_date': (now - timedelta(minutes=pk)).isoformat(),
+                'image': '',
+            }
+        for pk in range(1, volumes['comments'] + 1):
+            yield {
+                'type': 'comment', 'id': pk,
+                'post': rng.randint(1, volumes['posts']),
+                'author': rng.choice(users),
+                'text': text(),
+                'created': (now - timedelta(seconds=pk)).isoformat(),
+            }
+        pairs = {('user0', 'user1')}
+        while len(pairs) < min(volumes['follows'], len(users) ** 2 // 2):
+            user, author = rng.sample(users, 2)
+            pairs.add((user, author))
+        for user, author in sorted(pairs):
+            yield {'type': 'follow', 'user': user, 'author': author}
+
+    return sum(Importer().run(records()).values())
+
+
+def _targets():
+    """Запросы к каждой странице: имя -> (метод, url, данные)."""
+    post = Post.objects.filter(author__username='user1').first()
+    group_slug = (
+        Post.objects.exclude(group=None)
+        .values_list('group__slug', flat=True)
+        .first()
+    )
+    counter = iter(range(10 ** 9))
+    targets = {
+        'index': lambda: ('get', reverse('posts:index'), None),
+        'profile': lambda: ('get', reverse(
+            'posts:profile', kwargs={'username': 'user1'}
+        ), None),
+        'post_detail': lambda: ('get', reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}
+        ), None),
+        'follow_index': lambda: ('get', reverse('posts:follow_index'), None),
+        'post_create': lambda: ('post', reverse('posts:post_create'), {
+            'text': f'Замер {next(counter)}',
+        }),
+        'add_comment': lambda: ('post', reverse(
+            'posts:add_comment', kwargs={'post_id': post.pk}
+        ), {'text': f'Замер {next(counter)}'}),
+    }
+    if group_slug is not None:
+        targets['group_posts'] = lambda: ('get', reverse(
+            'posts:group_list', kwargs={'slug': group_slug}
+        ), None)
+    return targets
+
+
+def _request(client, target):
+    method, url, data = target()
+    response = getattr(client, method)(url, data)
+    if response.status_code >= 400:
+        raise AssertionError(f'{url}: ответ {response.status_code}')
+    return response
+
+
+def _client():
+    """Клиент от имени user0, подписанного на user1."""
+    client = Client()
+    client.force_login(
+        Follow.objects.select_related('user').get(
+            user__username='user0', author__username='user1'
+        ).user
+    )
+    return client
+
+
+@override_settings(DEBUG=False, CACHES=CACHES)
+def measure(runs=20, views=None):
+    """Замеры по страницам от имени user0, подписанного на user1.
+
+    DEBUG выключен, чтобы не мешала панель django-debug-toolbar.
+    """
+    client = _client()
+    report = {}
+    for name, target in _targets().items():
+        if views and name not in views:
+            continue
+        cache.clear()
+        # Журнал запросов очищается в начале каждого запроса клиента,
+        # поэтому число запросов берётся сразу после замера.
+        with CaptureQueriesContext(connection) as queries:
+            _request(client, target)
+        cold_queries = len(queries)
+        timings = []
+        for _ in range(max(runs, 2)):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                _request(client, target)
+                timings.append((time.perf_counter() - started) * 1000)
+            warm_queries = len(queries)
+        tracemalloc.start()
+        try:
+            _request(client, target)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        percentiles = statistics.quantiles(timings, n=20)
+        report[name] = {
+            'queries': warm_queries,
+            'cold_queries': cold_queries,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentiles[-1], 2),
+            'peak_kib': round(peak / 1024, 1),
+        }
+    return report
+
+
+def check(report, budgets=None):
+    """Список нарушений бюджета: (страница, метрика, значение, предел)."""
+    budgets = budgets or BUDGETS
+    failures = []
+    for name, metrics in report.items():
+        for metric, limit in budgets.get(name, {}).items():
+            if metric in metrics and metrics[metric] > limit:
+                failures.append((name, metric, metrics[metric], limit))
+    return failures
+
+
+@override_settings(DEBUG=False, CACHES=CACHES)
+def explain(views=None):
+    """Планы SELECT-запросов каждой страницы при пустом кеше.
+
+    Возвращает {страница: [(sql, [строки плана]), ...]}.
+    """
+    client = _client()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    plans = {}
+    for name, target in _targets().items():
+        if views and name not in views:
+            continue
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            _request(client, target)
+        statements = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+        plans[name] = []
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plans[name].append(
+                    (sql, [row[-1] for row in cursor.fetchall()])
+                )
+    return plans
+
+
+def _allowed(name, sql, detail, allowed):
+    return any(
+        name == view and fragment in sql and part in detail
+        for view, fragment, part in allowed
+    )
+
+
+def plan_problems(plans, allowed=ALLOWED_PLANS):
+    """Список (страница, sql, строка плана) с полным просмотром или
+    сортировкой во временном B-дереве, кроме allowed."""
+    return [
+        (name, sql, detail)
+        for name, statements in plans.items()
+        for sql, details in statements
+        for detail in details
+        if (FULL_SCAN.match(detail) or TEMP_SORT in detail)
+        and not _allowed(name, sql, detail, allowed)
+    ]
@@ -0,0 +1,103 @@
+"""ETag для условных GET лент и страницы поста.
+
+Страницы зависят от пользователя (шапка, кнопки подписки), поэтому
+его id входит в каждый ETag. Для лент используется поколение из
+posts.feed_cache, для поста — время изменения, число комментариев,
+время последнего из них, имя автора и группа, то есть один запрос без
+рендеринга. В форме комментария на странице поста есть CSRF-токен,
+который меняется при входе, поэтому в ETag входит и хеш CSRF-куки.
+
+Last-Modified выгрузки автора — последнее из времени изменения его
+записей и времени последнего удаления, которое сигналы пишут в кеш.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.middleware.csrf import get_token
+from django.utils import timezone
+
+from .feed_cache import feed_generation
+from .models import Comment, Post
+
+
+def _viewer(request):
+    return request.user.pk if request.user.is_authenticated else 0
+
+
+def _form_token(request):
+    # Форма с токеном есть только у вошедших. get_token() заводит куку,
+    # если её ещё нет, и страница отрендерится с тем же секретом.
+    if not request.user.is_authenticated:
+        return '0'
+    get_token(request)
+    return hashlib.md5(request.META['CSRF_COOKIE'].encode()).hexdigest()
+
+
+def feed_etag(kind):
+    """etag_func для condition() страниц ленты kind."""
+    def etag(request, *args, **kwargs):
+        return f'{kind}-{feed_generation(kind)}-{_viewer(request)}'
+    return etag
+
+
+def post_etag(request, post_id):
+    # Подзапрос вместо JOIN с Max(): без GROUP BY план не требует
+    # временного B-дерева, последний комментарий берётся из индекса.
+    last_comment = (
+        Comment.objects.filter(post=OuterRef('pk'))
+        .order_by('-created')
+        .values('created')[:1]
+    )
+    state = (
+        Post.objects.filter(pk=post_id)
+        .order_by()
+        .annotate(last_comment=Subquery(last_comment))
+        .values_list(
+            'updated',
+            'comments_count',
+            'last_comment',
+            'author__stats__posts_count',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__slug',
+            'group__title',
+        )
+        .first()
+    )
+    if state is None:
+        return None
+    updated, comments, last_comment, author_posts, *names = state
+    last_comment = last_comment.timestamp() if last_comment else 0
+    # Имена могут быть не в latin-1, а в заголовок идёт только хеш.
+    names = hashlib.md5(
+        '|'.join(name or '' for name in names).encode()
+    ).hexdigest()
+    return (
+        f'post-{post_id}-{updated.timestamp()}-{comments}-'
+        f'{last_comment}-{author_posts}-{names}-{_viewer(request)}-'
+        f'{_form_token(request)}'
+    )
+
+
+def export_key(author_id):
+    return f'export_deleted:{author_id}'
+
+
+def touch_export(author_id):
+    """Отмечает удаление поста или комментария из выгрузки автора.
+
+    В HTTP-датах нет долей секунды, поэтому отметка округляется вверх:
+    иначе удаление в ту же секунду, что и правка, не сдвинет
+    Last-Modified.
+    """
+    deleted_at = timezone.now().replace(microsecond=0) + timedelta(seconds=1)
+    cache.set(export_key(author_id), deleted_at, None)
+
+
+def export_deleted_at(author_id):
+    # Потерянная отметка начинается с текущего времени: лишний ответ
+    # 200 лучше, чем 304 для выгрузки с удалённым постом.
+    return cache.get_or_set(export_key(author_id), timezone.now, None)
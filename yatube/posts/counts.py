@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.db import DatabaseError, connections, router
+
+COUNT_TIMEOUT = 60 * 60
+# С какого размера таблицы оценка планировщика заменяет COUNT(*).
+ESTIMATE_THRESHOLD = 1_000_000
+
+
+def feed_key(kind, pk=None):
+    """Ключ кеша счётчика ленты: index, group:<id>, author:<id>..."""
+    if pk is None:
+        return f'feed_count:{kind}'
+    return f'feed_count:{kind}:{pk}'
+
+
+def estimate_count(model):
+    """Число строк таблицы по статистике планировщика или None."""
+    connection = connections[router.db_for_read(model)]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'sqlite':
+        sql = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1'
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    try:
+        return int(str(row[0]).split()[0])
+    except ValueError:
+        return None
+
+
+def feed_count(key, queryset, estimate=False):
+    """Число записей ленты из кеша.
+
+    При промахе для всей таблицы (estimate=True) сначала берётся оценка
+    планировщика, точный COUNT(*) выполняется только для небольших таблиц.
+    """
+    count = cache.get(key)
+    if count is not None:
+        return count
+    if estimate:
+        count = estimate_count(queryset.model)
+        if count is not None and count < ESTIMATE_THRESHOLD:
+            count = None
+    if count is None:
+        count = queryset.count()
+    cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+
+def bump(key, delta):
+    """Сдвигает закешированный счётчик; отсутствующий ключ не создаётся."""
+    try:
+        if cache.incr(key, delta) < 0:
+            cache.delete(key)
+    except ValueError:
+        pass
@@ -0,0 +1,52 @@
+"""Поколения лент — часть ключей фрагментного кеша и ETag.
+
+После bump_generation() первые REPLICA_PIN_SECONDS страницы ленты
+читают с основной базы: иначе отстающая реплика заполнила бы фрагменты
+и ETag нового поколения старыми данными, и они жили бы до следующей
+записи. Цена — при частых записях ленты почти всё время читают с
+основной базы; отставание реплик дольше REPLICA_PIN_SECONDS этим не
+закрывается.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import routers
+
+FEED_KINDS = ('index', 'group', 'profile', 'follow')
+
+
+def generation_key(kind):
+    return f'feed_generation:{kind}'
+
+
+def bumped_key(kind):
+    return f'feed_bumped:{kind}'
+
+
+def feed_generation(kind):
+    """Текущее поколение ленты — часть ключа фрагментного кеша.
+
+    Потерянный счётчик начинается заново со времени, поэтому старые
+    фрагменты не оживают после вытеснения ключа.
+    """
+    key = generation_key(kind)
+    values = cache.get_many([key, bumped_key(kind)])
+    if bumped_key(kind) in values:
+        routers.pin_primary()
+    if key in values:
+        return values[key]
+    return cache.get_or_set(key, lambda: time.time_ns(), None)
+
+
+def bump_generation(*kinds):
+    """Инвалидирует фрагменты лент без перебора ключей кеша."""
+    kinds = kinds or FEED_KINDS
+    for kind in kinds:
+        try:
+            cache.incr(generation_key(kind))
+        except ValueError:
+            cache.set(generation_key(kind), time.time_ns(), None)
+    seconds = getattr(settings, 'REPLICA_PIN_SECONDS', routers.PIN_SECONDS)
+    cache.set_many({bumped_key(kind): True for kind in kinds}, seconds)
@@ -26,3 +26,20 @@ class CommentForm(forms.ModelForm):
         help_texts = {
             'text': 'Текст комментария'
         }
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Поиск', max_length=200)
+    group = forms.SlugField(required=False)
+    author = forms.CharField(required=False, max_length=150)
+    cursor = forms.CharField(required=False)
+
+    def filter(self, posts):
+        """Сужает posts до выбранных группы и автора."""
+        if self.cleaned_data['group']:
+            posts = posts.filter(group__slug=self.cleaned_data['group'])
+        if self.cleaned_data['author']:
+            posts = posts.filter(
+                author__username=self.cleaned_data['author']
+            )
+        return posts
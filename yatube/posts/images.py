@@ -0,0 +1,113 @@
+"""Адаптивные варианты картинок постов для <picture> и srcset.
+
+Рядом с оригиналом posts/<имя>.<ext> создаётся каталог
+posts/<имя>.variants/ с картинками нескольких ширин в доступных
+форматах и manifest.json с их описанием.
+"""
+import json
+import os
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+VARIANT_WIDTHS = (320, 640, 960)
+# Пропорции совпадают с миниатюрой 960x339 в шаблонах.
+ASPECT = 339 / 960
+QUALITY = 80
+MANIFEST_TIMEOUT = 60 * 60 * 24
+# От более компактных форматов к запасному JPEG.
+FORMATS = (
+    ('AVIF', 'image/avif', 'avif'),
+    ('WEBP', 'image/webp', 'webp'),
+    ('JPEG', 'image/jpeg', 'jpg'),
+)
+
+
+def supported_formats():
+    Image.init()
+    return [fmt for fmt in FORMATS if fmt[0] in Image.SAVE]
+
+
+def variants_dir(name):
+    return f'{os.path.splitext(name)[0]}.variants'
+
+
+def manifest_key(name):
+    return f'image_manifest:{name}'
+
+
+def _save(storage, path, content):
+    if storage.exists(path):
+        storage.delete(path)
+    return storage.save(path, ContentFile(content))
+
+
+def build_variants(name, storage=default_storage):
+    """Создаёт варианты картинки name и возвращает манифест."""
+    with storage.open(name) as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    directory = variants_dir(name)
+    sources = {}
+    for width in VARIANT_WIDTHS:
+        resized = ImageOps.fit(
+            image,
+            (width, round(width * ASPECT)),
+            Image.LANCZOS,
+        )
+        for fmt, mime, ext in supported_formats():
+            buffer = BytesIO()
+            resized.save(buffer, fmt, quality=QUALITY)
+            path = _save(
+                storage, f'{directory}/{width}.{ext}', buffer.getvalue()
+            )
+            sources.setdefault(mime, []).append([path, width])
+    manifest = {
+        'width': VARIANT_WIDTHS[-1],
+        'height': round(VARIANT_WIDTHS[-1] * ASPECT),
+        'sources': sources,
+    }
+    _save(
+        storage,
+        f'{directory}/manifest.json',
+        json.dumps(manifest).encode(),
+    )
+    cache.set(manifest_key(name), manifest, MANIFEST_TIMEOUT)
+    return manifest
+
+
+def delete_variants(name, storage=default_storage):
+    """Удаляет варианты картинки name и её манифест из кеша."""
+    cache.delete(manifest_key(name))
+    directory = variants_dir(name)
+    try:
+        _, files = storage.listdir(directory)
+    except (OSError, SuspiciousFileOperation):
+        return
+    for file in files:
+        storage.delete(f'{directory}/{file}')
+    try:
+        os.rmdir(storage.path(directory))
+    except (NotImplementedError, OSError):
+        # Хранилища без каталогов удаляют их вместе с последним файлом.
+        pass
+
+
+def image_manifest(name, storage=default_storage):
+    """Манифест вариантов или None, если они ещё не созданы."""
+    manifest = cache.get(manifest_key(name))
+    if manifest is not None:
+        return manifest
+    path = f'{variants_dir(name)}/manifest.json'
+    try:
+        with storage.open(path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError, SuspiciousFileOperation):
+        return None
+    cache.set(manifest_key(name), manifest, MANIFEST_TIMEOUT)
+    return manifest
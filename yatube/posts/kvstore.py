@@ -0,0 +1,121 @@
+"""KVStore sorl-thumbnail в файле SQLite, общем для всех процессов.
+
+Подключается настройкой THUMBNAIL_KVSTORE, путь к файлу задаёт
+THUMBNAIL_SQLITE_FILE. В отличие от cached_db, записи переживают
+перезапуск и не дублируются в кеше каждого процесса, а prefetch()
+загружает миниатюры целой страницы ленты за одно обращение.
+"""
+import os
+import sqlite3
+import threading
+
+from django.conf import settings
+from django.core.signals import request_finished
+from sorl.thumbnail.helpers import deserialize
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+
+# Ограничение SQLite на число параметров в одном запросе.
+CHUNK_SIZE = 500
+
+
+class KVStore(KVStoreBase):
+    def __init__(self, filename=None):
+        super().__init__()
+        self.filename = filename or settings.THUMBNAIL_SQLITE_FILE
+        self._local = threading.local()
+        request_finished.connect(self.forget)
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self.filename, timeout=10, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS kvstore ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL) WITHOUT ROWID'
+            )
+            local.connection, local.pid, local.memo = (
+                connection, os.getpid(), {}
+            )
+        return local.connection
+
+    def _memo(self):
+        self._connection()
+        return self._local.memo
+
+    def forget(self, **kwargs):
+        """Сбрасывает загруженное prefetch(), вызывается в конце запроса."""
+        if getattr(self._local, 'pid', None) == os.getpid():
+            self._local.memo = {}
+
+    def _get_raw_many(self, keys):
+        keys = list(keys)
+        values = {}
+        for start in range(0, len(keys), CHUNK_SIZE):
+            chunk = keys[start:start + CHUNK_SIZE]
+            values.update(self._connection().execute(
+                'SELECT key, value FROM kvstore WHERE key IN (%s)'
+                % ', '.join('?' * len(chunk)),
+                chunk,
+            ).fetchall())
+        return values
+
+    def prefetch(self, files):
+        """Загружает записи миниатюр всех files двумя запросами.
+
+        Последующие поиски sorl-thumbnail в этом потоке до конца запроса
+        берут их из памяти.
+        """
+        sources = [ImageFile(file) for file in files if file]
+        memo = self._get_raw_many(
+            add_prefix(source.key, 'thumbnails') for source in sources
+        )
+        memo.update(self._get_raw_many(
+            add_prefix(key)
+            for value in memo.values()
+            for key in deserialize(value)
+        ))
+        self._memo().update(memo)
+
+    def _get_raw(self, key):
+        memo = self._memo()
+        if key in memo:
+            return memo[key]
+        row = self._connection().execute(
+            'SELECT value FROM kvstore WHERE key = ?', (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_raw(self, key, value):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO kvstore (key, value) VALUES (?, ?)',
+            (key, value),
+        )
+        # В память попадает только загруженное prefetch(): потоки пула
+        # миниатюр и команды не получают request_finished, и записанное
+        # ими копилось бы и устаревало до конца процесса.
+        self._memo().pop(key, None)
+
+    def _delete_raw(self, *keys):
+        memo = self._memo()
+        for start in range(0, len(keys), CHUNK_SIZE):
+            chunk = keys[start:start + CHUNK_SIZE]
+            self._connection().execute(
+                'DELETE FROM kvstore WHERE key IN (%s)'
+                % ', '.join('?' * len(chunk)),
+                chunk,
+            )
+        for key in keys:
+            memo.pop(key, None)
+
+    def _find_keys_raw(self, prefix):
+        return [
+            key for key, in self._connection().execute(
+                'SELECT key FROM kvstore WHERE substr(key, 1, ?) = ?',
+                (len(prefix), prefix),
+            )
+        ]
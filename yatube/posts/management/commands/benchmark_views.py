@@ -0,0 +1,83 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет запросы, время ответа и память страниц posts '
+        'на отдельной тестовой базе и сверяет с бюджетами'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in benchmarks.VOLUMES.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать: {name}',
+            )
+        parser.add_argument(
+            '--runs', type=int, default=20,
+            help='Повторов на страницу',
+        )
+        parser.add_argument(
+            '--view', action='append', dest='views',
+            help='Замерить только эту страницу (можно повторять)',
+        )
+        parser.add_argument('--report', help='Куда записать JSON-отчёт')
+        parser.add_argument(
+            '--budgets',
+            help='JSON с бюджетами вместо встроенных BUDGETS',
+        )
+
+    def handle(self, *args, **options):
+        budgets = benchmarks.BUDGETS
+        if options['budgets']:
+            with open(options['budgets'], encoding='utf-8') as file:
+                budgets = json.load(file)
+        volumes = {name: options[name] for name in benchmarks.VOLUMES}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            with override_settings(CACHES=benchmarks.CACHES):
+                seeded = benchmarks.seed(volumes)
+                report = benchmarks.measure(options['runs'], options['views'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        failures = benchmarks.check(report, budgets)
+        result = {
+            'volumes': volumes,
+            'seeded': seeded,
+            'runs': options['runs'],
+            'views': report,
+            'failures': [
+                dict(zip(('view', 'metric', 'value', 'limit'), failure))
+                for failure in failures
+            ],
+        }
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+        for name, metrics in report.items():
+            self.stdout.write(
+                f'{name:14} запросов {metrics["queries"]:>2} '
+                f'(холодный {metrics["cold_queries"]:>2}), '
+                f'p50 {metrics["p50_ms"]:7.2f} мс, '
+                f'p95 {metrics["p95_ms"]:7.2f} мс, '
+                f'память {metrics["peak_kib"]:8.1f} КиБ'
+            )
+        if failures:
+            raise CommandError('Превышены бюджеты: ' + '; '.join(
+                f'{view}.{metric} = {value} > {limit}'
+                for view, metric, value, limit in failures
+            ))
+        self.stdout.write(self.style.SUCCESS('Все бюджеты соблюдены'))
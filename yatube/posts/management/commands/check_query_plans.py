@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет планы SQLite для запросов страниц posts на отдельной '
+        'тестовой базе: без полных просмотров таблиц и сортировок во '
+        'временном B-дереве'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in benchmarks.VOLUMES.items():
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать: {name}',
+            )
+        parser.add_argument(
+            '--view', action='append', dest='views',
+            help='Проверить только эту страницу (можно повторять)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN есть только в SQLite')
+        volumes = {name: options[name] for name in benchmarks.VOLUMES}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            with override_settings(CACHES=benchmarks.CACHES):
+                benchmarks.seed(volumes)
+                plans = benchmarks.explain(options['views'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        problems = benchmarks.plan_problems(plans)
+        for name, statements in plans.items():
+            count = sum(problem[0] == name for problem in problems)
+            self.stdout.write(
+                f'{name:14} запросов {len(statements):>2}, '
+                f'проблем {count}'
+            )
+        if problems:
+            raise CommandError('Неудачные планы:\n' + '\n'.join(
+                f'{name}: {detail}\n    {sql}'
+                for name, sql, detail in problems
+            ))
+        self.stdout.write(self.style.SUCCESS('Все планы используют индексы'))
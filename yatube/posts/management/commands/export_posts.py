@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.transfer import CHUNK_SIZE, FORMATS, export_records, write_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты, комментарии и подписки '
+        'в JSON Lines или CSV'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл; по умолчанию стандартный вывод',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        records = export_records(options['chunk_size'])
+        if options['path'] == '-':
+            total = write_records(records, self.stdout, options['format'])
+        else:
+            with open(
+                options['path'], 'w', encoding='utf-8', newline=''
+            ) as stream:
+                total = write_records(records, stream, options['format'])
+        elapsed = time.monotonic() - started
+        # В stdout может идти сама выгрузка, поэтому отчёт — в stderr.
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено записей: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} в секунду)'
+        ))
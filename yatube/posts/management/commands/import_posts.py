@@ -0,0 +1,52 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts.transfer import BATCH_SIZE, FORMATS, Importer, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы, посты, комментарии и подписки '
+        'из JSON Lines или CSV, созданного export_posts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл; по умолчанию стандартный ввод',
+        )
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько записей вставлять в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        importer = Importer(options['batch_size'])
+        stream = (
+            sys.stdin if options['path'] == '-'
+            else open(options['path'], encoding='utf-8', newline='')
+        )
+        try:
+            counts = importer.run(read_records(stream, options['format']))
+        except (ValueError, KeyError, IntegrityError) as error:
+            raise CommandError(f'Загрузка прервана: {error!r}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.monotonic() - started
+        total = sum(counts.values())
+        for kind, count in counts.items():
+            self.stdout.write(f'{kind}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено записей: {total} за {elapsed:.1f} с '
+            f'({total / max(elapsed, 1e-9):.0f} в секунду)'
+        ))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Post
+from posts.search import get_index, refresh_tokens
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковые индексы постов и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retokenize',
+            action='store_true',
+            help='Сначала пересчитать термы постов и комментариев',
+        )
+
+    def handle(self, *args, **options):
+        if options['retokenize']:
+            for model in (Post, Comment):
+                total = refresh_tokens(model.objects.order_by())
+                self.stdout.write(
+                    f'{model._meta.verbose_name_plural}: '
+                    f'пересчитано термов {total}'
+                )
+        for model in (Post, Comment):
+            index = get_index(model)
+            index.rebuild(
+                model.objects.only('pk', 'tokens').order_by().iterator()
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Проиндексировано '
+                f'{model._meta.verbose_name_plural}: '
+                f'{model.objects.count()} ({type(index).__name__})'
+            ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Follow
+from posts.timelines import build_timeline
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок в кеше'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Только ленты этих пользователей',
+        )
+
+    def handle(self, *args, **options):
+        followers = Follow.objects.all()
+        if options['usernames']:
+            followers = followers.filter(
+                user__username__in=options['usernames']
+            )
+        user_ids = followers.values_list('user_id', flat=True).distinct()
+        total = 0
+        for user_id in user_ids.iterator():
+            build_timeline(user_id)
+            total += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересобрано лент: {total}')
+        )
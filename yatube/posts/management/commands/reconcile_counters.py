@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.stats import reconcile_author_stats, reconcile_comments_count
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов, комментариев и подписок'
+
+    def handle(self, *args, **options):
+        authors = reconcile_author_stats()
+        posts = reconcile_comments_count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено: статистика авторов — {authors}, '
+            f'счётчики комментариев — {posts}'
+        ))
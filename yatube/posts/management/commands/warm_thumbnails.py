@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import THUMBNAIL_WORKERS, warm_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Создаёт миниатюры для уже загруженных картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=THUMBNAIL_WORKERS,
+            help='Число потоков',
+        )
+
+    def handle(self, *args, **options):
+        names = list(
+            Post.objects.exclude(image='')
+            .exclude(image__isnull=True)
+            .values_list('image', flat=True)
+            .distinct()
+        )
+        started = time.monotonic()
+        done = warm_thumbnails(names, options['workers'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюр создано для {done} картинок '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
@@ -0,0 +1,69 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:42
+
+from collections import Counter
+
+from django.db import migrations, models
+
+from posts.text import token_string
+
+BATCH_SIZE = 1000
+
+
+def fill_tokens(apps, schema_editor):
+    for name in ('Post', 'Comment'):
+        model = apps.get_model('posts', name)
+        batch = []
+        for row in model.objects.only('pk', 'text').iterator(BATCH_SIZE):
+            row.tokens = token_string(row.text)
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                model.objects.bulk_update(batch, ['tokens'])
+                batch = []
+        model.objects.bulk_update(batch, ['tokens'])
+
+
+def reindex_stems(apps, schema_editor):
+    """Переводит поисковый индекс со слов на основы."""
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    connection = schema_editor.connection
+    if 'posts_search' in connection.introspection.table_names():
+        schema_editor.execute('DELETE FROM posts_search')
+        schema_editor.execute(
+            'INSERT INTO posts_search (rowid, body) '
+            'SELECT id, tokens FROM posts_post'
+        )
+        return
+    SearchTerm.objects.all().delete()
+    rows = []
+    for post in Post.objects.only('pk', 'tokens').iterator(BATCH_SIZE):
+        rows.extend(
+            SearchTerm(post_id=post.pk, term=term, tf=tf)
+            for term, tf in Counter(post.tokens.split()).items()
+        )
+        if len(rows) >= BATCH_SIZE:
+            SearchTerm.objects.bulk_create(rows)
+            rows = []
+    SearchTerm.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='tokens',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Термы текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='tokens',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Термы текста'),
+        ),
+        migrations.RunPython(fill_tokens, migrations.RunPython.noop),
+        migrations.RunPython(reindex_stems, migrations.RunPython.noop),
+    ]
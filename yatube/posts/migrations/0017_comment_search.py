@@ -0,0 +1,79 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:28
+
+from collections import Counter
+
+from django.db import OperationalError, migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def create_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE posts_comment_search USING fts5(body)'
+            )
+        except OperationalError:
+            # SQLite собран без FTS5 — поиск пойдёт через CommentTerm.
+            pass
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_comment_search')
+
+
+def index_comments(apps, schema_editor):
+    """Индексирует термы уже существующих комментариев."""
+    Comment = apps.get_model('posts', 'Comment')
+    CommentTerm = apps.get_model('posts', 'CommentTerm')
+    connection = schema_editor.connection
+    if 'posts_comment_search' in connection.introspection.table_names():
+        schema_editor.execute(
+            'INSERT INTO posts_comment_search (rowid, body) '
+            'SELECT id, tokens FROM posts_comment'
+        )
+        return
+    rows = []
+    for comment in Comment.objects.only('pk', 'tokens').iterator(BATCH_SIZE):
+        rows.extend(
+            CommentTerm(comment_id=comment.pk, term=term, tf=tf)
+            for term, tf in Counter(comment.tokens.split()).items()
+        )
+        if len(rows) >= BATCH_SIZE:
+            CommentTerm.objects.bulk_create(rows)
+            rows = []
+    CommentTerm.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Терм')),
+                ('tf', models.PositiveSmallIntegerField(verbose_name='Число вхождений')),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Comment', verbose_name='Комментарий')),
+            ],
+            options={
+                'verbose_name': 'Терм поиска по комментариям',
+                'verbose_name_plural': 'Термы поиска по комментариям',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='commentterm',
+            index=models.Index(fields=['term', 'comment'], name='comment_term_idx'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(index_comments, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,22 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+FEED_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'updated',
+    'image',
+    'author',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group',
+    'group__slug',
+    'group__title',
+    'comments_count',
+)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -13,6 +29,12 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа одним JOIN, только нужные поля."""
+        return self.select_related('author', 'group').only(*FEED_FIELDS)
+
+
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField(
@@ -20,16 +42,20 @@ class Post(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+    # Отдельные индексы не нужны: их заменяют составные из Meta.
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name='posts')
+        related_name='posts',
+        db_index=False)
     group = models.ForeignKey(
         Group,
         blank=True,
         null=True,
         on_delete=models.SET_NULL,
-        related_name='posts'
+        related_name='posts',
+        db_index=False
     )
     image = models.ImageField(
         'Картинка',
@@ -38,12 +64,39 @@ class Post(models.Model):
         null=True,
         help_text='Вставьте картинку'
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
+    tokens = models.TextField(
+        'Термы текста',
+        blank=True,
+        default='',
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ('-pub_date',)
+        # Ленты группы и автора идут по ORDER BY -pub_date, -id: индекс
+        # читается с конца, и порядок id в нём совпадает с нужным.
+        # У индекса с -pub_date он был бы обратным, и SQLite досортировывал
+        # бы одинаковые даты во временном B-дереве.
+        indexes = [
+            models.Index(
+                fields=['group', 'pub_date'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='post_author_pub_date_idx'
+            ),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -54,6 +107,7 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Имя поста',
         related_name='comments',
+        db_index=False,
     )
     author = models.ForeignKey(
         User,
@@ -66,8 +120,21 @@ class Comment(models.Model):
         'Время создания комментария',
         auto_now_add=True
     )
+    tokens = models.TextField(
+        'Термы текста',
+        blank=True,
+        default='',
+        editable=False,
+    )
 
     class Meta:
+        ordering = ('created',)
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_created_idx'
+            ),
+        ]
         verbose_name = 'Комментарии'
 
     def __str__(self):
@@ -79,13 +146,15 @@ class Follow(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='follower',
-        verbose_name='Подписавшийся'
+        verbose_name='Подписавшийся',
+        db_index=False
     )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
         related_name='following',
-        verbose_name='Автор поста'
+        verbose_name='Автор поста',
+        db_index=False
     )
 
     class Meta:
@@ -95,3 +164,84 @@ class Follow(models.Model):
                 name='unique_follows'
             )
         ]
+        # Подписки читателя; подписчиков автора покрывает unique_follows.
+        indexes = [
+            models.Index(
+                fields=['user', 'author'],
+                name='follow_user_author_idx'
+            ),
+        ]
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class SearchTerm(models.Model):
+    """Строка инвертированного индекса поиска по постам."""
+
+    term = models.CharField('Терм', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Пост'
+    )
+    tf = models.PositiveSmallIntegerField('Число вхождений')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['term', 'post'],
+                name='search_term_post_idx'
+            ),
+        ]
+        verbose_name = 'Терм поиска'
+        verbose_name_plural = 'Термы поиска'
+
+    def __str__(self):
+        return self.term
+
+
+class CommentTerm(models.Model):
+    """Строка инвертированного индекса поиска по комментариям."""
+
+    term = models.CharField('Терм', max_length=64)
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name='Комментарий'
+    )
+    tf = models.PositiveSmallIntegerField('Число вхождений')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['term', 'comment'],
+                name='comment_term_idx'
+            ),
+        ]
+        verbose_name = 'Терм поиска по комментариям'
+        verbose_name_plural = 'Термы поиска по комментариям'
+
+    def __str__(self):
+        return self.term
@@ -0,0 +1,254 @@
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+NEXT = 'n'
+PREVIOUS = 'p'
+PAGE_WINDOW = 5
+# Дальше этой страницы ?page=N стоил бы глубокого OFFSET: в окне номеров
+# такие страницы ссылаются только курсорами соседних страниц.
+OFFSET_PAGES = 2 * PAGE_WINDOW + 1
+
+
+def encode_cursor(direction, number, post):
+    """Упаковывает позицию в ленте в непрозрачную строку для URL."""
+    raw = f'{direction}|{number}|{post.pub_date.isoformat()}|{post.pk}'
+    return urlsafe_base64_encode(raw.encode())
+
+
+def decode_cursor(cursor):
+    """Возвращает (direction, number, pub_date, pk) или None."""
+    try:
+        direction, number, pub_date, pk = (
+            urlsafe_base64_decode(cursor).decode().split('|')
+        )
+        number, pk = int(number), int(pk)
+        pub_date = parse_datetime(pub_date)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or pub_date is None or number < 1:
+        return None
+    return direction, number, pub_date, pk
+
+
+def comments_chunk(comments, per_page, after=None):
+    """Порция комментариев по (created, id) после курсора after.
+
+    Возвращает список комментариев и курсор следующей порции или None.
+    """
+    comments = comments.order_by('created', 'pk')
+    try:
+        created, pk = urlsafe_base64_decode(after or '').decode().split('|')
+        created, pk = parse_datetime(created), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        created = None
+    if created is not None:
+        comments = comments.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    rows = list(comments[:per_page + 1])
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    last = rows[-1]
+    raw = f'{last.created.isoformat()}|{last.pk}'
+    return rows, urlsafe_base64_encode(raw.encode())
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинация ленты по (pub_date, id).
+
+    Страница выбирается условием по индексу pub_date вместо OFFSET,
+    COUNT(*) не выполняется: известны только страницы до текущей
+    и следующая, если за текущей есть записи. Общее число записей
+    total (например, из posts.counts) нужно только для окна номеров.
+    """
+
+    offset_pages = OFFSET_PAGES
+
+    def __init__(self, object_list, per_page, total=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.total = total
+        self._known_count = 0
+        self._known_pages = 1
+
+    @property
+    def count(self):
+        return self._known_count
+
+    @property
+    def num_pages(self):
+        return self._known_pages
+
+    def get_page(self, cursor=None, number=None):
+        """Страница по курсору, ?page=N остаётся для старых ссылок."""
+        position = decode_cursor(cursor) if cursor else None
+        if position is not None:
+            return self._seek(*position)
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        return self._slice(number)
+
+    def _slice(self, number):
+        offset = (number - 1) * self.per_page
+        rows = list(
+            self.object_list.order_by('-pub_date', '-pk')[
+                offset:offset + self.per_page + 1
+            ]
+        )
+        if not rows and number > 1:
+            return self._last_page(number)
+        return self._build(rows, number)
+
+    def _last_page(self, number):
+        """Последняя страница для ?page=N за концом ленты.
+
+        Как Paginator.get_page, но без глубокого OFFSET: последние записи
+        берутся с конца ленты. Границы страниц зависят от точного числа
+        записей, поэтому вместо total (он бывает оценкой) — один COUNT(*).
+        """
+        total = self.object_list.count()
+        last = min(-(-total // self.per_page), number - 1)
+        if last <= 1:
+            return self._slice(1)
+        size = min(total - (last - 1) * self.per_page, self.per_page)
+        rows = list(self.object_list.order_by('pub_date', 'pk')[:size])
+        if not rows:
+            return self._slice(1)
+        rows.reverse()
+        return self._build(rows, last, has_more=False)
+
+    def _seek(self, direction, number, pub_date, pk):
+        if direction == NEXT:
+            rows = list(
+                self.object_list.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+                ).order_by('-pub_date', '-pk')[:self.per_page + 1]
+            )
+            if not rows:
+                return self._slice(1)
+            return self._build(rows, number)
+        rows = list(
+            self.object_list.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+            ).order_by('pub_date', 'pk')[:self.per_page + 1]
+        )
+        if len(rows) <= self.per_page:
+            return self._slice(1)
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return self._build(rows, max(number, 2), has_more=True)
+
+    def _build(self, rows, number, has_more=None):
+        if has_more is None:
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+        has_more = has_more and bool(rows)
+        self._known_pages = number + 1 if has_more else number
+        self._known_count = (
+            (number - 1) * self.per_page + len(rows) + int(has_more)
+        )
+        page = self._get_page(rows, number, self)
+        page.next_cursor = (
+            encode_cursor(NEXT, number + 1, rows[-1]) if has_more else None
+        )
+        page.previous_cursor = (
+            encode_cursor(PREVIOUS, number - 1, rows[0])
+            if number > 1 and rows else None
+        )
+        page.page_window = self.page_window(number)
+        page.page_links = self.page_links(page)
+        return page
+
+    def page_window(self, number):
+        """Номера страниц вокруг текущей, не больше 2 * PAGE_WINDOW + 1."""
+        last = self._known_pages
+        if self.total is not None:
+            last = max(last, -(-self.total // self.per_page))
+        return range(
+            max(number - PAGE_WINDOW, 1),
+            min(number + PAGE_WINDOW, last) + 1,
+        )
+
+    def page_links(self, page):
+        """Пары (номер, ссылка) окна; None — у страницы нет дешёвой ссылки.
+
+        Соседние страницы открываются курсором, остальные — ?page=N,
+        только если их OFFSET не больше offset_pages страниц.
+        """
+        links = []
+        for number in page.page_window:
+            if number == page.number - 1 and page.previous_cursor:
+                link = f'?cursor={page.previous_cursor}'
+            elif number == page.number + 1 and page.next_cursor:
+                link = f'?cursor={page.next_cursor}'
+            elif self.offset_pages is None or number <= self.offset_pages:
+                link = f'?page={number}'
+            else:
+                link = None
+            links.append((number, link))
+        return links
+
+
+class TimelinePaginator(CursorPaginator):
+    """Те же курсоры поверх готовой ленты из posts.timelines.
+
+    object_list — список пар (pub_date, id) от новых к старым, посты
+    страницы достаются одним запросом in_bulk. Номер страницы здесь —
+    срез списка в памяти, поэтому ссылки ?page=N не ограничены.
+    """
+
+    offset_pages = None
+
+    def __init__(self, object_list, per_page, queryset, **kwargs):
+        kwargs.setdefault('total', len(object_list))
+        super().__init__(object_list, per_page, **kwargs)
+        self.queryset = queryset
+
+    def _hydrate(self, entries):
+        posts = self.queryset.in_bulk([pk for _, pk in entries])
+        return [posts[pk] for _, pk in entries if pk in posts]
+
+    def _slice(self, number):
+        offset = (number - 1) * self.per_page
+        entries = self.object_list[offset:offset + self.per_page + 1]
+        if not entries and number > 1:
+            return self._last_page(number)
+        has_more = len(entries) > self.per_page
+        return self._build(
+            self._hydrate(entries[:self.per_page]), number, has_more
+        )
+
+    def _last_page(self, number):
+        last = -(-len(self.object_list) // self.per_page)
+        return self._slice(max(last, 1))
+
+    def _seek(self, direction, number, pub_date, pk):
+        position = (pub_date, pk)
+        if direction == NEXT:
+            start = next(
+                (i for i, entry in enumerate(self.object_list)
+                 if entry < position),
+                len(self.object_list),
+            )
+            entries = self.object_list[start:start + self.per_page + 1]
+            if not entries:
+                return self._slice(1)
+            has_more = len(entries) > self.per_page
+            return self._build(
+                self._hydrate(entries[:self.per_page]), number, has_more
+            )
+        end = next(
+            (i for i, entry in enumerate(self.object_list)
+             if entry <= position),
+            len(self.object_list),
+        )
+        if end <= self.per_page:
+            return self._slice(1)
+        entries = self.object_list[end - self.per_page:end]
+        return self._build(
+            self._hydrate(entries), max(number, 2), has_more=True
+        )
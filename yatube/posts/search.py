@@ -0,0 +1,257 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Термы поста (поле tokens, см. posts.text) попадают в один из двух
+индексов: виртуальную таблицу FTS5 posts_search (SQLite с FTS5) или
+таблицу SearchTerm на чистом Python для остальных баз. Оба индекса
+обновляются сигналами при сохранении и удалении поста и отдают
+результаты, упорядоченные по rank (меньше — релевантнее). Комментарии
+так же индексируются в posts_comment_search или CommentTerm.
+"""
+import math
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import (
+    Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+)
+from django.db.models.expressions import RawSQL
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .counts import feed_count, feed_key
+from .models import Comment, CommentTerm, Post, SearchTerm
+from .text import token_string, tokenize
+
+BATCH_SIZE = 1000
+FTS_TABLE = 'posts_search'
+COMMENT_FTS_TABLE = 'posts_comment_search'
+# Таблица FTS5, модель термов и её внешний ключ для каждой модели.
+INDEXED = {
+    Post: (FTS_TABLE, SearchTerm, 'post'),
+    Comment: (COMMENT_FTS_TABLE, CommentTerm, 'comment'),
+}
+
+
+class TermIndex:
+    """Инвертированный индекс в таблице термов, rank — минус tf-idf."""
+
+    def __init__(self, model=Post):
+        self.model = model
+        _, self.terms, self.field = INDEXED[model]
+
+    def update(self, row):
+        with transaction.atomic():
+            self.remove(row.pk)
+            self.terms.objects.bulk_create(self._rows(row))
+
+    def remove(self, pk):
+        self.terms.objects.filter(**{f'{self.field}_id': pk}).delete()
+
+    def rebuild(self, rows):
+        self.terms.objects.all().delete()
+        self.add(rows)
+
+    def add(self, rows):
+        """Добавляет в индекс строки, которых в нём ещё нет."""
+        terms = []
+        for row in rows:
+            terms.extend(self._rows(row))
+            if len(terms) >= BATCH_SIZE:
+                self.terms.objects.bulk_create(terms)
+                terms = []
+        self.terms.objects.bulk_create(terms)
+
+    def _rows(self, row):
+        return [
+            self.terms(**{f'{self.field}_id': row.pk}, term=term, tf=tf)
+            for term, tf in Counter(row.tokens.split()).items()
+        ]
+
+    def matching(self, queryset, terms):
+        return queryset.filter(pk__in=(
+            self.terms.objects.filter(term__in=terms)
+            .values(self.field)
+            .annotate(matched=Count('term', distinct=True))
+            .filter(matched=len(set(terms)))
+            .values(self.field)
+        ))
+
+    def _total(self):
+        if self.model is Post:
+            return feed_count(feed_key('index'), Post.objects.all(), True)
+        return self.model.objects.count()
+
+    def rank(self, terms):
+        frequencies = dict(
+            self.terms.objects.filter(term__in=terms)
+            .values_list('term')
+            .annotate(Count(self.field))
+        )
+        total = self._total()
+        weights = [
+            When(term=term, then=F('tf') * Value(
+                math.log(1 + total / frequencies[term])
+            ))
+            for term in set(terms) if term in frequencies
+        ]
+        return Subquery(
+            self.terms.objects.filter(
+                **{self.field: OuterRef('pk')}, term__in=terms
+            )
+            .values(self.field)
+            .annotate(score=-Sum(Case(
+                *weights, default=Value(0.0), output_field=FloatField()
+            )))
+            .values('score'),
+            output_field=FloatField(),
+        )
+
+
+class FTS5Index:
+    """Индекс во виртуальной таблице FTS5, rank — bm25()."""
+
+    def __init__(self, model=Post):
+        self.model = model
+        self.table = INDEXED[model][0]
+
+    def _cursor(self):
+        return connections[router.db_for_write(self.model)].cursor()
+
+    def update(self, row):
+        with self._cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [row.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, body) VALUES (%s, %s)',
+                [row.pk, row.tokens],
+            )
+
+    def remove(self, pk):
+        with self._cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [pk]
+            )
+
+    def rebuild(self, rows):
+        with self._cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+        self.add(rows)
+
+    def add(self, rows):
+        """Добавляет в индекс строки, которых в нём ещё нет."""
+        with self._cursor() as cursor:
+            batch = []
+            for row in rows:
+                batch.append([row.pk, row.tokens])
+                if len(batch) >= BATCH_SIZE:
+                    self._insert(cursor, batch)
+                    batch = []
+            self._insert(cursor, batch)
+
+    def _insert(self, cursor, batch):
+        cursor.executemany(
+            f'INSERT INTO {self.table} (rowid, body) VALUES (%s, %s)', batch
+        )
+
+    def _match(self, terms):
+        return ' '.join('"{}"'.format(term.replace('"', '""'))
+                        for term in terms)
+
+    def matching(self, queryset, terms):
+        # pk__in=RawSQL(...) дал бы IN ((SELECT ...)), а это скалярный
+        # подзапрос, возвращающий только первую строку.
+        return queryset.extra(
+            where=[
+                f'{self.model._meta.db_table}.id IN (SELECT rowid '
+                f'FROM {self.table} WHERE {self.table} MATCH %s)'
+            ],
+            params=[self._match(terms)],
+        )
+
+    def rank(self, terms):
+        return RawSQL(
+            f'SELECT bm25({self.table}) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s '
+            f'AND rowid = {self.model._meta.db_table}.id',
+            [self._match(terms)],
+            output_field=FloatField(),
+        )
+
+
+def refresh_tokens(queryset):
+    """Пересчитывает поле tokens строк queryset пачками."""
+    batch, total = [], 0
+    for row in queryset.only('pk', 'text').iterator(BATCH_SIZE):
+        row.tokens = token_string(row.text)
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            queryset.model.objects.bulk_update(batch, ['tokens'])
+            total += len(batch)
+            batch = []
+    queryset.model.objects.bulk_update(batch, ['tokens'])
+    return total + len(batch)
+
+
+@lru_cache(maxsize=None)
+def _has_fts_table(alias, table):
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        return False
+    return table in connection.introspection.table_names()
+
+
+def get_index(model=Post):
+    """Индекс model из POSTS_SEARCH_INDEX: 'fts5', 'terms' или 'auto'."""
+    backend = getattr(settings, 'POSTS_SEARCH_INDEX', 'auto')
+    if backend == 'auto':
+        alias = router.db_for_read(model)
+        backend = (
+            'fts5' if _has_fts_table(alias, INDEXED[model][0]) else 'terms'
+        )
+    return FTS5Index(model) if backend == 'fts5' else TermIndex(model)
+
+
+def filter_matching(queryset, query):
+    """Строки queryset (посты или комментарии) со всеми термами query."""
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+    return get_index(queryset.model).matching(queryset, terms)
+
+
+def _encode(post):
+    return urlsafe_base64_encode(f'{post.rank!r}|{post.pk}'.encode())
+
+
+def _decode(cursor):
+    try:
+        rank, pk = urlsafe_base64_decode(cursor or '').decode().split('|')
+        return float(rank), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+
+def search(queryset, query, limit, cursor=None):
+    """Страница результатов по релевантности и курсор следующей.
+
+    Курсор — пара (rank, id) последнего поста, поэтому следующая
+    страница выбирается условием, а не OFFSET.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return [], None
+    index = get_index()
+    posts = index.matching(queryset, terms).annotate(
+        rank=index.rank(terms)
+    )
+    position = _decode(cursor)
+    if position is not None:
+        rank, pk = position
+        posts = posts.filter(Q(rank__gt=rank) | Q(rank=rank, pk__lt=pk))
+    rows = list(posts.order_by('rank', '-pk')[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode(rows[-1])
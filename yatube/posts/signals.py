@@ -0,0 +1,192 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .conditional import touch_export
+from .counts import bump, feed_key
+from .feed_cache import bump_generation
+from .images import delete_variants
+from .models import AuthorStats, Comment, Follow, Group, Post
+from .search import get_index
+from .stats import shift_author_stats, shift_comments_count
+from .text import token_string
+from .thumbnails import enqueue_thumbnails
+from .timelines import push_post, remove_post, reset_timeline
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous(sender, instance, **kwargs):
+    """Запоминает прежние группу и картинку поста."""
+    instance._old_group_id, instance._old_image = None, None
+    if instance.pk is not None:
+        instance._old_group_id, instance._old_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('group_id', 'image')
+            .first()
+        ) or (None, None)
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def fill_tokens(sender, instance, **kwargs):
+    instance.tokens = token_string(instance.text)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        bump(feed_key('index'), 1)
+        bump(feed_key('author', instance.author_id), 1)
+        if instance.group_id is not None:
+            bump(feed_key('group', instance.group_id), 1)
+        push_post(instance)
+        return
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if old_group_id != instance.group_id:
+        if old_group_id is not None:
+            bump(feed_key('group', old_group_id), -1)
+        if instance.group_id is not None:
+            bump(feed_key('group', instance.group_id), 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    bump(feed_key('index'), -1)
+    bump(feed_key('author', instance.author_id), -1)
+    if instance.group_id is not None:
+        bump(feed_key('group', instance.group_id), -1)
+    remove_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def touch_post_export(sender, instance, **kwargs):
+    touch_export(instance.author_id)
+
+
+@receiver(post_delete, sender=Comment)
+def touch_comment_export(sender, instance, **kwargs):
+    author_id = (
+        Post.objects.filter(pk=instance.post_id)
+        .values_list('author_id', flat=True)
+        .first()
+    )
+    if author_id is not None:
+        touch_export(author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_follower_timeline(sender, instance, **kwargs):
+    reset_timeline(instance.user_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_feeds(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_generation()
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, **kwargs):
+    # Подписка меняет ленту подписчика и кнопку в профиле автора.
+    bump_generation('follow', 'profile')
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_author_post(sender, instance, created, **kwargs):
+    if created:
+        shift_author_stats(instance.author_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_author_post(sender, instance, **kwargs):
+    shift_author_stats(instance.author_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance, created, **kwargs):
+    if created:
+        shift_comments_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance, **kwargs):
+    shift_comments_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        shift_author_stats(instance.author_id, 'followers_count', 1)
+        shift_author_stats(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    shift_author_stats(instance.author_id, 'followers_count', -1)
+    shift_author_stats(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, **kwargs):
+    if instance.image.name != getattr(instance, '_old_image', None):
+        enqueue_thumbnails(instance)
+
+
+def _drop_variants(name):
+    if name:
+        transaction.on_commit(lambda: delete_variants(name))
+
+
+@receiver(post_save, sender=Post)
+def drop_replaced_variants(sender, instance, **kwargs):
+    old_image = getattr(instance, '_old_image', None)
+    if old_image != instance.image.name:
+        _drop_variants(old_image)
+
+
+@receiver(post_delete, sender=Post)
+def drop_deleted_variants(sender, instance, **kwargs):
+    _drop_variants(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, created, **kwargs):
+    if created:
+        get_index().add([instance])
+    else:
+        get_index().update(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_index().remove(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, created, **kwargs):
+    if created:
+        get_index(Comment).add([instance])
+    else:
+        get_index(Comment).update(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    get_index(Comment).remove(instance.pk)
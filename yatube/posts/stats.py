@@ -0,0 +1,104 @@
+"""Денормализованные счётчики постов, комментариев и подписок."""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+def _count(model, field, outer):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+def _author_counts():
+    return {
+        'posts_count': _count(Post, 'author', 'user_id'),
+        'followers_count': _count(Follow, 'author', 'user_id'),
+        'following_count': _count(Follow, 'user', 'user_id'),
+    }
+
+
+def _reconcile(queryset, counts):
+    """Пересчитывает строки, где счётчик разошёлся с реальным числом."""
+    drifted = queryset.annotate(
+        **{f'actual_{field}': expr for field, expr in counts.items()}
+    )
+    mismatch = Q()
+    for field in counts:
+        mismatch |= ~Q(**{field: F(f'actual_{field}')})
+    ids = list(drifted.filter(mismatch).values_list('pk', flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        queryset.model.objects.filter(
+            pk__in=ids[start:start + BATCH_SIZE]
+        ).update(**counts)
+    return len(ids)
+
+
+def reconcile_author_stats(users=None):
+    """Создаёт недостающие AuthorStats и исправляет расхождения."""
+    if users is None:
+        users = User.objects.all()
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(user_id=pk)
+            for pk in users.filter(stats__isnull=True).values_list(
+                'pk', flat=True
+            )
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return _reconcile(
+        AuthorStats.objects.filter(user__in=users), _author_counts()
+    )
+
+
+def reconcile_comments_count(posts=None):
+    if posts is None:
+        posts = Post.objects.all()
+    return _reconcile(
+        posts, {'comments_count': _count(Comment, 'post', 'pk')}
+    )
+
+
+def shift_author_stats(user_id, field, delta):
+    """Атомарно сдвигает счётчик автора.
+
+    Счётчик не уходит ниже нуля; если строки статистики нет, она
+    создаётся пересчётом.
+    """
+    users = User.objects.filter(pk=user_id)
+    stats = AuthorStats.objects.filter(user_id=user_id)
+    if delta >= 0:
+        if not stats.update(**{field: F(field) + delta}):
+            reconcile_author_stats(users)
+        return
+    updated = stats.filter(**{f'{field}__gte': -delta}).update(
+        **{field: F(field) + delta}
+    )
+    if not updated and not stats.exists():
+        # Каскадное удаление пользователя убирает его статистику раньше
+        # постов и подписок, поэтому пересчёт ждёт коммита: к нему уже
+        # ясно, остался ли пользователь.
+        transaction.on_commit(lambda: reconcile_author_stats(users))
+
+
+def shift_comments_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    posts.update(comments_count=F('comments_count') + delta)
@@ -0,0 +1,72 @@
+"""Карточки постов в лентах с кешем на каждую версию поста.
+
+Ключ карточки — id поста и хеш всего, что в ней показано: даты
+изменения (меняется при правке, смене группы и картинки), картинки,
+имени автора и группы. Устаревшие версии не нужно удалять: на них
+больше никто не ссылается, и они вытесняются по таймауту.
+"""
+import hashlib
+
+from django import template
+from django.template import Context
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from ..images import image_manifest
+from .post_images import prefetch_thumbnails
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/post_card.html'
+CARD_TIMEOUT = 60 * 60 * 24
+
+
+def card_key(post):
+    author, group = post.author, post.group
+    version = '|'.join((
+        post.updated.isoformat() if post.updated else '',
+        post.image.name or '',
+        author.username,
+        author.first_name,
+        author.last_name,
+        group.slug if group else '',
+        group.title if group else '',
+    ))
+    digest = hashlib.md5(version.encode()).hexdigest()
+    return f'post_card:{post.pk}:{digest}'
+
+
+def _cacheable(post):
+    # Пока варианты картинки не готовы, карточка показывает миниатюру
+    # sorl; такую не кешируем, чтобы потом не отдавать её вместо <picture>.
+    return not post.image or image_manifest(post.image.name) is not None
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """HTML карточек: из кеша одним get_many, недостающие — рендерятся.
+
+    Карточки рендерит движок самой страницы, с его загрузчиками.
+    """
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cards = cache.get_many(keys)
+    missing = [
+        (key, post) for key, post in zip(keys, posts) if key not in cards
+    ]
+    if missing:
+        prefetch_thumbnails(post for _, post in missing)
+        card = context.template.engine.get_template(CARD_TEMPLATE)
+        rendered = {
+            key: card.render(
+                Context({'post': post}, autoescape=context.autoescape)
+            )
+            for key, post in missing
+        }
+        cards.update(rendered)
+        cache.set_many(
+            {key: rendered[key] for key, post in missing if _cacheable(post)},
+            getattr(settings, 'POST_CARD_TIMEOUT', CARD_TIMEOUT),
+        )
+    return [mark_safe(cards[key]) for key in keys]
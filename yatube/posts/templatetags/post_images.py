@@ -0,0 +1,46 @@
+from django import template
+from django.core.files.storage import default_storage
+from sorl.thumbnail import default
+
+from ..images import image_manifest
+
+register = template.Library()
+
+SIZES = '(max-width: 960px) 100vw, 960px'
+
+
+def _srcset(items):
+    return ', '.join(
+        f'{default_storage.url(path)} {width}w' for path, width in items
+    )
+
+
+@register.inclusion_tag('includes/picture.html')
+def picture(image, sizes=SIZES):
+    """<picture> с вариантами картинки или миниатюра sorl, если их нет."""
+    manifest = image_manifest(image.name) if image else None
+    context = {'image': image, 'sizes': sizes, 'picture': None}
+    if manifest is None:
+        return context
+    sources = dict(manifest['sources'])
+    fallback = sources.pop('image/jpeg')
+    context['picture'] = {
+        'sources': [
+            {'type': mime, 'srcset': _srcset(items)}
+            for mime, items in sources.items()
+        ],
+        'src': default_storage.url(fallback[-1][0]),
+        'srcset': _srcset(fallback),
+        'width': manifest['width'],
+        'height': manifest['height'],
+    }
+    return context
+
+
+@register.simple_tag
+def prefetch_thumbnails(posts):
+    """Загружает миниатюры всей страницы одним обращением к KVStore."""
+    prefetch = getattr(default.kvstore, 'prefetch', None)
+    if prefetch is not None:
+        prefetch(post.image for post in posts)
+    return ''
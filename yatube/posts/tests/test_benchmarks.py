@@ -0,0 +1,86 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts import benchmarks
+
+
+class BenchmarkBudgetTests(TestCase):
+    """Число запросов страниц укладывается в бюджет на малом объёме."""
+
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({
+            'users': 10, 'groups': 2, 'posts': 60,
+            'comments': 80, 'follows': 20,
+        })
+
+    def test_query_budgets(self):
+        report = benchmarks.measure(runs=2)
+        self.assertEqual(set(report), set(benchmarks.BUDGETS))
+        query_budgets = {
+            name: {
+                metric: limit for metric, limit in budget.items()
+                if metric.endswith('queries')
+            }
+            for name, budget in benchmarks.BUDGETS.items()
+        }
+        self.assertEqual(benchmarks.check(report, query_budgets), [])
+
+    def test_live_cache_is_untouched(self):
+        cache.clear()
+        cache.set('benchmark-sentinel', 'живой')
+        benchmarks.measure(runs=2, views=['index', 'post_create'])
+        self.assertEqual(cache.get('benchmark-sentinel'), 'живой')
+        self.assertFalse([
+            key for key in cache._cache
+            if 'timeline' in key or 'feed_count' in key
+        ])
+
+    def test_check_reports_regressions(self):
+        report = {'index': {'queries': 9, 'p95_ms': 1.0}}
+        self.assertEqual(
+            benchmarks.check(report),
+            [('index', 'queries', 9, benchmarks.BUDGETS['index']['queries'])],
+        )
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц идут по индексам без временных сортировок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        benchmarks.seed({
+            'users': 20, 'groups': 3, 'posts': 300,
+            'comments': 300, 'follows': 40,
+        })
+
+    def test_views_use_indexes(self):
+        plans = benchmarks.explain()
+        self.assertEqual(set(plans), set(benchmarks.BUDGETS))
+        self.assertEqual(benchmarks.plan_problems(plans), [])
+
+    def test_live_cache_is_untouched(self):
+        cache.set('benchmark-sentinel', 'живой')
+        benchmarks.explain(views=['index'])
+        self.assertEqual(cache.get('benchmark-sentinel'), 'живой')
+
+    def test_problems_are_detected(self):
+        plans = {
+            'index': [
+                ('SELECT 1 FROM posts_post', ['SCAN posts_post']),
+                ('SELECT 2', ['SCAN TABLE posts_comment']),
+                ('SELECT 3', ['USE TEMP B-TREE FOR ORDER BY']),
+                ('SELECT 4', [
+                    'SCAN posts_post USING INDEX posts_post_pub_date',
+                    'SCAN sqlite_stat1',
+                ]),
+            ],
+        }
+        self.assertEqual(
+            [detail for _, _, detail in benchmarks.plan_problems(plans)],
+            [
+                'SCAN posts_post',
+                'SCAN TABLE posts_comment',
+                'USE TEMP B-TREE FOR ORDER BY',
+            ],
+        )
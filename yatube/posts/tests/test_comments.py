@@ -0,0 +1,52 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@mock.patch('posts.views.COMMENTS_QUANTITY', 3)
+class PostCommentsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Текст')
+        for i in range(5):
+            commenter = User.objects.create_user(username=f'reader{i}')
+            Comment.objects.create(
+                post=cls.post, author=commenter, text=f'Комментарий {i}'
+            )
+
+    def test_post_detail_shows_first_chunk(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        # ETag, пост с автором и группой, комментарии.
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2'],
+        )
+        response = self.client.get(
+            url + f'?comments={response.context["next_comments"]}'
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Комментарий 3', 'Комментарий 4'],
+        )
+        self.assertIsNone(response.context['next_comments'])
+
+    def test_comments_json_endpoint(self):
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.pk})
+        data = self.client.get(url).json()
+        self.assertEqual(
+            [comment['author'] for comment in data['comments']],
+            ['reader0', 'reader1', 'reader2'],
+        )
+        data = self.client.get(url, {'after': data['next']}).json()
+        self.assertEqual(len(data['comments']), 2)
+        self.assertIsNone(data['next'])
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Текст'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertRevalidates(self, url, change, client=None):
+        client = client or self.client
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        change()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feeds_revalidate_after_new_post(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertRevalidates(url, lambda: Post.objects.create(
+                    author=self.author, group=self.group, text='Ещё'
+                ))
+
+    def test_post_detail_revalidates_after_edit_and_comment(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+
+        def edit():
+            self.post.text = 'Исправлено'
+            self.post.save()
+
+        self.assertRevalidates(url, edit)
+        self.assertRevalidates(url, lambda: Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        ))
+
+    def test_post_detail_revalidates_after_rename(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+
+        def rename_author():
+            self.author.first_name = 'Лев'
+            self.author.save()
+
+        def rename_group():
+            self.group.title = 'Новая группа'
+            self.group.save()
+
+        self.assertRevalidates(url, rename_author)
+        self.assertRevalidates(url, rename_group)
+
+    def test_post_detail_revalidates_after_relogin(self):
+        User.objects.create_user(username='guest', password='Пароль-123')
+        credentials = {'username': 'guest', 'password': 'Пароль-123'}
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.post(reverse('users:login'), credentials)
+
+        def relogin():
+            self.client.get(reverse('users:logout'))
+            self.client.post(reverse('users:login'), credentials)
+
+        self.assertRevalidates(url, relogin)
+
+    def test_edit_bumps_updated(self):
+        updated = self.post.updated
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertGreater(self.post.updated, updated)
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).pub_date, self.post.pub_date
+        )
+
+    def test_follow_index_revalidates_after_follow(self):
+        self.client.force_login(self.reader)
+        self.assertRevalidates(
+            reverse('posts:follow_index'),
+            lambda: Follow.objects.create(
+                user=self.reader, author=self.author
+            ),
+        )
+
+    def test_etag_depends_on_viewer(self):
+        url = reverse('posts:index')
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.reader)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
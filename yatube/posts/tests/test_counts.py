@@ -0,0 +1,92 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.counts import feed_count, feed_key
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class FeedCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='test_description'
+        )
+        for i in range(3):
+            Post.objects.create(
+                text=f'{i}. Текст', author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_count_is_cached(self):
+        feed_count(feed_key('index'), Post.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                feed_count(feed_key('index'), Post.objects.all()), 3
+            )
+
+    def test_create_and_delete_bump_cached_counts(self):
+        keys = {
+            feed_key('index'): Post.objects.all(),
+            feed_key('author', self.author.pk): self.author.posts.all(),
+            feed_key('group', self.group.pk): self.group.posts.all(),
+        }
+        for key, queryset in keys.items():
+            feed_count(key, queryset)
+        post = Post.objects.create(
+            text='Новый', author=self.author, group=self.group
+        )
+        for key, queryset in keys.items():
+            with self.subTest(key=key):
+                self.assertEqual(feed_count(key, queryset), 4)
+        post.delete()
+        for key, queryset in keys.items():
+            with self.subTest(key=key):
+                self.assertEqual(feed_count(key, queryset), 3)
+
+    def test_group_change_moves_count(self):
+        other = Group.objects.create(
+            title='Другая', slug='other', description='other'
+        )
+        feed_count(feed_key('group', self.group.pk), self.group.posts.all())
+        feed_count(feed_key('group', other.pk), other.posts.all())
+        post = self.group.posts.first()
+        post.group = other
+        post.save()
+        self.assertEqual(cache.get(feed_key('group', self.group.pk)), 2)
+        self.assertEqual(cache.get(feed_key('group', other.pk)), 1)
+
+    def test_page_window_is_bounded(self):
+        posts = [
+            Post(text=str(i), author=self.author) for i in range(200)
+        ]
+        Post.objects.bulk_create(posts)
+        response = self.client.get(reverse('posts:index') + '?page=10')
+        self.assertEqual(
+            list(response.context['page_obj'].page_window), list(range(5, 16))
+        )
+
+    def test_deep_pages_link_only_by_cursor(self):
+        posts = [
+            Post(text=str(i), author=self.author) for i in range(200)
+        ]
+        Post.objects.bulk_create(posts)
+        page_obj = self.client.get(
+            reverse('posts:index') + '?page=15'
+        ).context['page_obj']
+        links = dict(page_obj.page_links)
+        self.assertEqual(links[11], '?page=11')
+        self.assertIsNone(links[12])
+        self.assertEqual(links[14], f'?cursor={page_obj.previous_cursor}')
+        self.assertIsNone(links[15])
+        self.assertEqual(links[16], f'?cursor={page_obj.next_cursor}')
+        self.assertIsNone(links[17])
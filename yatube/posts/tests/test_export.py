@@ -0,0 +1,98 @@
+import json
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from posts.conditional import export_key
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+PUB_DATE = datetime(2021, 3, 1, 10, 0, tzinfo=timezone.utc)
+
+
+class ProfileExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        other = User.objects.create_user(username='other')
+        cls.post = Post.objects.create(author=cls.author, text='Первый')
+        Post.objects.create(author=other, text='Чужой')
+        Post.objects.filter(pk=cls.post.pk).update(
+            pub_date=PUB_DATE, updated=PUB_DATE
+        )
+        Comment.objects.create(post=cls.post, author=other, text='Ответ')
+        cls.url = reverse(
+            'posts:profile_export', kwargs={'username': 'author'}
+        )
+
+    def test_streams_author_posts(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response['Content-Type'].split(';')[0], 'application/x-ndjson'
+        )
+        records = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual(
+            [(r['type'], r['text']) for r in records], [('post', 'Первый')]
+        )
+
+    def test_csv_with_comments(self):
+        response = self.client.get(
+            self.url, {'format': 'csv', 'comments': '1'}
+        )
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('type,id,'))
+        self.assertEqual(
+            [line.split(',')[0] for line in lines[1:]], ['post', 'comment']
+        )
+        self.assertIn('author.csv', response['Content-Disposition'])
+
+    def assertNotModified(self, params=None):
+        response = self.client.get(self.url, params)
+        last_modified = response['Last-Modified']
+        response = self.client.get(
+            self.url, params, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
+        return last_modified
+
+    def test_if_modified_since(self):
+        cache.set(export_key(self.author.pk), PUB_DATE, None)
+        response = self.client.get(self.url)
+        self.assertEqual(response['Last-Modified'], http_date(
+            PUB_DATE.timestamp()
+        ))
+        self.assertNotModified()
+        Post.objects.create(author=self.author, text='Новый')
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=http_date(PUB_DATE.timestamp())
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_changes_last_modified(self):
+        params = {'comments': '1'}
+        deletes = (
+            lambda: Comment.objects.filter(post=self.post).delete(),
+            lambda: Post.objects.filter(author=self.author).delete(),
+        )
+        for delete in deletes:
+            with self.subTest(delete=delete):
+                cache.set(export_key(self.author.pk), PUB_DATE, None)
+                last_modified = self.assertNotModified(params)
+                delete()
+                response = self.client.get(
+                    self.url, params, HTTP_IF_MODIFIED_SINCE=last_modified
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_unknown_author(self):
+        url = reverse('posts:profile_export', kwargs={'username': 'nobody'})
+        self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from posts.images import (
+    VARIANT_WIDTHS, build_variants, image_manifest, manifest_key,
+    variants_dir
+)
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageVariantsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self):
+        return Template(
+            '{% load post_images %}{% picture post.image %}'
+        ).render(Context({'post': self.post}))
+
+    def test_build_variants_writes_manifest(self):
+        build_variants(self.post.image.name)
+        cache.clear()
+        manifest = image_manifest(self.post.image.name)
+        self.assertEqual(
+            [width for _, width in manifest['sources']['image/jpeg']],
+            list(VARIANT_WIDTHS),
+        )
+        self.assertEqual(manifest['width'], 960)
+        self.assertEqual(manifest['height'], 339)
+
+    def test_picture_tag_renders_srcset(self):
+        build_variants(self.post.image.name)
+        html = self.render()
+        self.assertIn('<picture>', html)
+        for width in VARIANT_WIDTHS:
+            self.assertIn(f'{width}w', html)
+
+    def test_picture_tag_falls_back_to_thumbnail(self):
+        shutil.rmtree(
+            os.path.join(TEMP_MEDIA_ROOT, variants_dir(self.post.image.name)),
+            ignore_errors=True,
+        )
+        html = self.render()
+        self.assertNotIn('<picture>', html)
+        self.assertIn('<img class="card-img my-2" src="', html)
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.user,
+            text='Ещё пост',
+            image=SimpleUploadedFile(
+                name='other.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    def assertVariantsDeleted(self, name):
+        self.assertFalse(default_storage.exists(variants_dir(name)))
+        self.assertIsNone(cache.get(manifest_key(name)))
+
+    @mock.patch('posts.signals.transaction.on_commit', lambda func: func())
+    def test_delete_post_removes_variants(self):
+        post = self.create_post()
+        name = post.image.name
+        build_variants(name)
+        post.delete()
+        self.assertVariantsDeleted(name)
+
+    @mock.patch('posts.signals.transaction.on_commit', lambda func: func())
+    def test_new_image_removes_old_variants(self):
+        post = self.create_post()
+        name = post.image.name
+        build_variants(name)
+        post.image = SimpleUploadedFile(
+            name='new.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+        post.save()
+        self.assertVariantsDeleted(name)
+        post.text = 'Без новой картинки'
+        build_variants(post.image.name)
+        post.save()
+        self.assertIsNotNone(image_manifest(post.image.name))
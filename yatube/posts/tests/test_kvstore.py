@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts.kvstore import KVStore
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SQLiteKVStoreTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {i}',
+                image=SimpleUploadedFile(
+                    name=f'small{i}.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            )
+            for i in range(3)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.store = KVStore(os.path.join(TEMP_MEDIA_ROOT, 'kv.sqlite3'))
+        self.store.clear()
+
+    def test_raw_operations(self):
+        self.store._set_raw('sorl-thumbnail||image||a', '1')
+        self.store._set_raw('sorl-thumbnail||image||b', '2')
+        self.store.forget()
+        self.assertEqual(self.store._get_raw('sorl-thumbnail||image||a'), '1')
+        self.assertCountEqual(
+            self.store._find_keys_raw('sorl-thumbnail||image||'),
+            ['sorl-thumbnail||image||a', 'sorl-thumbnail||image||b'],
+        )
+        self.store._delete_raw('sorl-thumbnail||image||a')
+        self.assertIsNone(self.store._get_raw('sorl-thumbnail||image||a'))
+
+    def test_store_is_shared_between_instances(self):
+        self.store._set_raw('sorl-thumbnail||image||a', '1')
+        other = KVStore(self.store.filename)
+        self.assertEqual(other._get_raw('sorl-thumbnail||image||a'), '1')
+
+    def test_writes_are_not_memoized(self):
+        key = 'sorl-thumbnail||image||a'
+        self.store._set_raw(key, '1')
+        self.assertNotIn(key, self.store._memo())
+        other = KVStore(self.store.filename)
+        other._set_raw(key, '2')
+        self.assertEqual(self.store._get_raw(key), '2')
+        other._delete_raw(key)
+        self.assertIsNone(self.store._get_raw(key))
+
+    def test_prefetch_resolves_page_in_two_queries(self):
+        with self.settings(THUMBNAIL_KVSTORE='posts.kvstore.KVStore'):
+            thumbnails = []
+            for post in self.posts:
+                source = ImageFile(post.image)
+                thumbnail = get_thumbnail(post.image, '960x339')
+                self.store.set(source)
+                self.store.set(thumbnail, source)
+                thumbnails.append(thumbnail)
+        self.store.forget()
+        queries = []
+        self.store._connection().set_trace_callback(queries.append)
+        self.store.prefetch(post.image for post in self.posts)
+        for thumbnail in thumbnails:
+            self.assertEqual(self.store.get(thumbnail).name, thumbnail.name)
+        self.assertEqual(len(queries), 2)
@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.templatetags import post_cards
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', first_name='Анна', last_name='Петрова'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='other', description='Описание'
+        )
+        Post.objects.bulk_create([
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(10)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def page(self):
+        return list(Post.objects.for_feed()[:10])
+
+    def context(self):
+        context = Context()
+        context.template = Template('')
+        return context
+
+    def cards(self, posts, context=None):
+        return post_cards.post_cards(context or self.context(), posts)
+
+    def key(self, post):
+        return post_cards.card_key(
+            Post.objects.for_feed().get(pk=post.pk)
+        )
+
+    def test_page_costs_one_cache_round_trip(self):
+        posts = self.page()
+        first = self.cards(posts)
+        context = self.context()
+        with mock.patch.object(
+            post_cards.cache, 'get_many', wraps=cache.get_many
+        ) as get_many, mock.patch.object(
+            context.template.engine, 'get_template'
+        ) as get_template:
+            second = self.cards(posts, context)
+        get_many.assert_called_once()
+        get_template.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertEqual(len(second), 10)
+        self.assertIn('Пост 9', second[0])
+
+    def test_only_missing_cards_are_rendered(self):
+        posts = self.page()
+        self.cards(posts[:7])
+        with mock.patch.object(
+            post_cards.cache, 'set_many', wraps=cache.set_many
+        ) as set_many:
+            self.cards(posts)
+        self.assertEqual(len(set_many.call_args[0][0]), 3)
+
+    def test_version_changes_with_shown_data(self):
+        post = Post.objects.first()
+        changes = (
+            lambda: setattr(post, 'text', 'Правка') or post.save(),
+            lambda: setattr(post, 'group', self.other_group) or post.save(),
+            lambda: setattr(post, 'image', 'posts/new.jpg') or post.save(),
+            lambda: User.objects.filter(pk=self.author.pk).update(
+                first_name='Мария'
+            ),
+            lambda: Group.objects.filter(pk=self.other_group.pk).update(
+                title='Новое название'
+            ),
+        )
+        keys = [self.key(post)]
+        for change in changes:
+            change()
+            keys.append(self.key(post))
+        self.assertEqual(len(set(keys)), len(changes) + 1)
+
+    def test_card_without_image_variants_is_not_cached(self):
+        # Файла нет — значит, нет и манифеста вариантов.
+        post = Post.objects.first()
+        post.image = 'posts/pending.jpg'
+        post.save()
+        self.cards([Post.objects.for_feed().get(pk=post.pk)])
+        self.assertIsNone(cache.get(self.key(post)))
+        others = [other for other in self.page() if other.pk != post.pk]
+        self.cards(others)
+        self.assertEqual(
+            len(cache.get_many([self.key(other) for other in self.page()])),
+            9,
+        )
+
+    def test_author_rename_reaches_feeds(self):
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        self.assertContains(self.client.get(url), 'Анна Петрова')
+        self.author.first_name = 'Мария'
+        self.author.save()
+        response = self.client.get(url)
+        self.assertContains(response, 'Мария Петрова')
+        self.assertNotContains(response, 'Анна Петрова')
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueryCountTests(TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='test_description'
+        )
+        cls.author = User.objects.create_user(
+            username='author', first_name='Имя', last_name='Фамилия'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(10):
+            Post.objects.create(
+                text=f'{i}. Текст', author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_feed_pages_query_count(self):
+        pages = {
+            reverse('posts:index'): 5,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 5,
+            reverse('posts:profile', kwargs={'username': 'author'}): 6,
+            reverse('posts:follow_index'): 5,
+        }
+        for url, queries in pages.items():
+            with self.subTest(url=url):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    self.client.get(url)
@@ -0,0 +1,161 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, CommentTerm, Group, Post, SearchTerm
+from posts.search import (
+    FTS5Index, TermIndex, filter_matching, get_index, search
+)
+
+User = get_user_model()
+
+
+class SearchTestsMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.often = Post.objects.create(
+            author=cls.author, text='Кот кот кот и собака'
+        )
+        cls.once = Post.objects.create(
+            author=cls.other, group=cls.group, text='Кот спит'
+        )
+        cls.dog = Post.objects.create(author=cls.author, text='Собака')
+        cls.comment = Comment.objects.create(
+            post=cls.dog, author=cls.other, text='Коты спят'
+        )
+        Comment.objects.create(post=cls.dog, author=cls.other, text='Кот')
+
+    def found(self, query, queryset=None):
+        posts, _ = search(queryset or Post.objects.all(), query, 10)
+        return [post.pk for post in posts]
+
+    def test_inflected_forms(self):
+        self.assertEqual(self.found('котами'), self.found('кот'))
+        self.assertCountEqual(
+            self.found('собаки'), [self.often.pk, self.dog.pk]
+        )
+
+    def test_ranked_results(self):
+        self.assertEqual(
+            self.found('кот'), [self.often.pk, self.once.pk]
+        )
+        self.assertEqual(self.found('кот собака'), [self.often.pk])
+        self.assertEqual(self.found('слон'), [])
+        self.assertEqual(self.found('!!!'), [])
+
+    def test_index_follows_save_and_delete(self):
+        self.dog.text = 'Кот'
+        self.dog.save()
+        self.assertIn(self.dog.pk, self.found('кот'))
+        self.assertNotIn(self.dog.pk, self.found('собака'))
+        post = Post.objects.create(author=self.other, text='Слон спит')
+        post_id = post.pk
+        post.delete()
+        self.assertNotIn(post_id, self.found('спит'))
+
+    def test_keyset_pagination(self):
+        for i in range(5):
+            Post.objects.create(author=self.author, text=f'Кот номер {i}')
+        seen, cursor = [], None
+        while True:
+            posts, cursor = search(Post.objects.all(), 'кот', 3, cursor)
+            seen += [post.pk for post in posts]
+            if cursor is None:
+                break
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+        self.assertEqual(seen[0], self.often.pk)
+
+    def test_rebuild_command(self):
+        Post.objects.filter(pk=self.dog.pk).update(text='Слон')
+        call_command(
+            'rebuild_search_index', '--retokenize', stdout=StringIO()
+        )
+        self.assertEqual(self.found('слон'), [self.dog.pk])
+        self.assertEqual(self.found('собака'), [self.often.pk])
+
+    def test_views_apply_filters(self):
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'кот', 'group': 'group'}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['posts']], [self.once.pk]
+        )
+        # Результаты — те же карточки, что и в лентах.
+        self.assertContains(
+            response, reverse('posts:profile', args=['other'])
+        )
+        self.assertContains(
+            response, reverse('posts:group_list', args=['group'])
+        )
+        data = self.client.get(
+            reverse('posts:search_api'), {'q': 'кот', 'author': 'author'}
+        ).json()
+        self.assertEqual(
+            [post['id'] for post in data['results']], [self.often.pk]
+        )
+        self.assertIsNone(data['next'])
+
+    def test_admin_uses_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'спит'}
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['cl'].result_list],
+            [self.once.pk],
+        )
+
+    def test_admin_comment_search_uses_index(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('admin:posts_comment_changelist'), {'q': 'котами спят'}
+            )
+        self.assertEqual(
+            [comment.pk for comment in response.context['cl'].result_list],
+            [self.comment.pk],
+        )
+        self.assertFalse(
+            any(' LIKE ' in query['sql'] for query in queries)
+        )
+        comments = Comment.objects.filter(pk=self.comment.pk)
+        comments.delete()
+        self.assertFalse(filter_matching(comments, 'кот'))
+
+
+@override_settings(POSTS_SEARCH_INDEX='fts5')
+class FTS5SearchTests(SearchTestsMixin, TestCase):
+    def test_backend(self):
+        self.assertIsInstance(get_index(), FTS5Index)
+        self.assertIsInstance(get_index(Comment), FTS5Index)
+        self.assertFalse(SearchTerm.objects.exists())
+        self.assertFalse(CommentTerm.objects.exists())
+
+
+@override_settings(POSTS_SEARCH_INDEX='terms')
+class TermSearchTests(SearchTestsMixin, TestCase):
+    def test_backend(self):
+        self.assertIsInstance(get_index(), TermIndex)
+        self.assertEqual(
+            SearchTerm.objects.get(post=self.often, term='кот').tf, 3
+        )
+        self.assertEqual(
+            CommentTerm.objects.get(comment=self.comment, term='кот').tf, 1
+        )
@@ -0,0 +1,110 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from io import StringIO
+from unittest import mock
+
+from posts.models import AuthorStats, Comment, Follow, Post
+
+User = get_user_model()
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def stats(self, user):
+        return AuthorStats.objects.get(user=user)
+
+    def test_post_create_and_delete_update_posts_count(self):
+        self.reader_client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertEqual(self.stats(self.reader).posts_count, 1)
+        Post.objects.get(author=self.reader).delete()
+        self.assertEqual(self.stats(self.reader).posts_count, 0)
+
+    def test_comments_count(self):
+        post = Post.objects.create(author=self.author, text='Текст')
+        self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Комментарий'},
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        Comment.objects.all().delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_and_unfollow_update_counts(self):
+        follow_url = reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}
+        )
+        self.reader_client.get(follow_url)
+        self.reader_client.get(follow_url)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_reconcile_counters_fixes_drift(self):
+        post = Post.objects.create(author=self.author, text='Текст')
+        Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.filter(user=self.reader).delete()
+        AuthorStats.objects.filter(user=self.author).update(posts_count=7)
+        Post.objects.filter(pk=post.pk).update(comments_count=3)
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('авторов — 2', out.getvalue())
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_deleting_user_with_posts(self):
+        author = User.objects.create_user(username='leaving')
+        Post.objects.create(author=author, text='Текст')
+        Follow.objects.create(user=self.reader, author=author)
+        author_id = author.pk
+        author.delete()
+        self.assertFalse(
+            AuthorStats.objects.filter(user_id=author_id).exists()
+        )
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    @mock.patch('posts.stats.transaction.on_commit', lambda func: func())
+    def test_decrement_without_stats_row_recounts(self):
+        post = Post.objects.create(author=self.author, text='Текст')
+        Post.objects.create(author=self.author, text='Текст')
+        AuthorStats.objects.filter(user=self.author).delete()
+        post.delete()
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+
+    def test_migration_fills_counters(self):
+        post = Post.objects.create(author=self.author, text='Текст')
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        Follow.objects.create(user=self.reader, author=self.author)
+        AuthorStats.objects.all().delete()
+        Post.objects.update(comments_count=0)
+        import_module(
+            'posts.migrations.0011_author_stats'
+        ).fill_counters(apps, None)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
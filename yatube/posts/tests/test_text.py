@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.text import stem, tokenize
+
+User = get_user_model()
+
+
+class StemTests(TestCase):
+    def test_russian_words(self):
+        cases = {
+            'котами': 'кот',
+            'коты': 'кот',
+            'важнейшие': 'важн',
+            'валяется': 'валя',
+            'великолепной': 'великолепн',
+            'сделанный': 'сдела',
+            'радость': 'радост',
+        }
+        for word, expected in cases.items():
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_tokenize_normalizes(self):
+        self.assertEqual(
+            tokenize('Ёлки, ЕЛКИ и Hello_world 42!'),
+            ['елк', 'елк', 'и', 'hello_world', '42'],
+        )
+
+
+class TokensFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.user, text='Коты спят')
+
+    def test_tokens_filled_on_save(self):
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).tokens, 'кот спят'
+        )
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='Котами'
+        )
+        self.assertEqual(Comment.objects.get(pk=comment.pk).tokens, 'кот')
+
+    def test_comment_admin_matches_stems(self):
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Про котов'
+        )
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Про котлеты'
+        )
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        self.client.force_login(admin)
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'кот'}
+        )
+        self.assertEqual(
+            [comment.text for comment in response.context['cl'].result_list],
+            ['Про котов'],
+        )
@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def run_now(func, *args):
+    func(*args)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.thumbnails.transaction.on_commit', run_now)
+@mock.patch('posts.thumbnails._executor.submit', run_now)
+@mock.patch('posts.thumbnails.get_thumbnail')
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self):
+        self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'Пост с картинкой',
+            'image': SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        })
+        return Post.objects.get(author=self.user)
+
+    def test_thumbnails_generated_on_upload(self, get_thumbnail):
+        post = self.create_post()
+        get_thumbnail.assert_called_once_with(
+            post.image.name, '960x339', crop='center', upscale=True
+        )
+
+    @override_settings(POSTS_THUMBNAILS_ASYNC=True)
+    def test_async_generation_uses_pool(self, get_thumbnail):
+        with mock.patch('posts.thumbnails._executor.submit') as submit:
+            post = self.create_post()
+        submit.assert_called_once_with(
+            thumbnails._generate_in_worker, post.image.name
+        )
+        get_thumbnail.assert_not_called()
+
+    @override_settings(POSTS_THUMBNAILS_ASYNC=False)
+    def test_sync_generation_skips_pool(self, get_thumbnail):
+        with mock.patch('posts.thumbnails._executor.submit') as submit:
+            post = self.create_post()
+        submit.assert_not_called()
+        get_thumbnail.assert_called_once_with(
+            post.image.name, '960x339', crop='center', upscale=True
+        )
+
+    def test_edit_without_new_image_skips_generation(self, get_thumbnail):
+        post = self.create_post()
+        get_thumbnail.reset_mock()
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': 'Новый текст'},
+        )
+        get_thumbnail.assert_not_called()
+
+    def test_warm_thumbnails_command(self, get_thumbnail):
+        post = self.create_post()
+        Post.objects.create(author=self.user, text='Без картинки')
+        get_thumbnail.reset_mock()
+        out = StringIO()
+        call_command('warm_thumbnails', workers=1, stdout=out)
+        get_thumbnail.assert_called_once_with(
+            post.image.name, '960x339', crop='center', upscale=True
+        )
+        self.assertIn('для 1 картинок', out.getvalue())
@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post
+from posts.timelines import (
+    CELEBRITIES_KEY, celebrities, push_posts, timeline_entries, timeline_key
+)
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(13):
+            Post.objects.create(text=f'{i}. Текст', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed(self):
+        return list(
+            Post.objects.filter(
+                author__following__user=self.reader
+            ).order_by('-pub_date', '-pk')
+        )
+
+    def pks(self):
+        return [pk for _, pk in timeline_entries(self.reader.pk)]
+
+    def test_new_post_is_pushed_into_timeline(self):
+        timeline_entries(self.reader.pk)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.pks()[0], post.pk)
+        post.delete()
+        self.assertIsNone(cache.get(timeline_key(self.reader.pk)))
+        self.assertNotIn(post.pk, self.pks())
+
+    def test_concurrent_pushes_are_not_lost(self):
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=other)
+        timeline_entries(self.reader.pk)
+        with mock.patch('posts.signals.push_post'):
+            first = Post.objects.create(text='Первый', author=self.author)
+            second = Post.objects.create(text='Второй', author=other)
+        # Оба автора пишут, не видя записи друг друга.
+        push_posts(self.author.pk, [first])
+        push_posts(other.pk, [second])
+        with self.assertNumQueries(0):
+            pks = self.pks()
+        self.assertEqual(pks[:2], [second.pk, first.pk])
+
+    def test_follow_changes_reset_timeline(self):
+        timeline_entries(self.reader.pk)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertIsNone(cache.get(timeline_key(self.reader.pk)))
+
+    def test_follow_index_pages_through_timeline(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        first_page = list(response.context['page_obj'])
+        response = self.reader_client.get(
+            reverse('posts:follow_index')
+            + f'?cursor={response.context["page_obj"].next_cursor}'
+        )
+        self.assertEqual(first_page + list(response.context['page_obj']),
+                         self.feed())
+
+    def test_follow_index_page_past_the_end_shows_last_page(self):
+        response = self.reader_client.get(
+            reverse('posts:follow_index') + '?page=99'
+        )
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(
+            list(response.context['page_obj']), self.feed()[10:]
+        )
+
+    def test_follow_index_hydrates_page_in_one_query(self):
+        timeline_entries(self.reader.pk)
+        celebrities()
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        with self.assertNumQueries(1):
+            response.context['page_obj'].paginator.get_page()
+
+    def test_celebrity_posts_are_pulled_on_read(self):
+        timeline_entries(self.reader.pk)
+        cache.delete(CELEBRITIES_KEY)
+        with mock.patch('posts.timelines.FANOUT_LIMIT', 0):
+            post = Post.objects.create(text='Новый пост', author=self.author)
+        _, _, entries = cache.get(timeline_key(self.reader.pk))
+        self.assertNotEqual(entries[0][1], post.pk)
+        self.assertEqual(self.pks(), [post.pk for post in self.feed()])
+
+    def test_former_celebrity_timeline_is_rebuilt(self):
+        cache.delete(CELEBRITIES_KEY)
+        with mock.patch('posts.timelines.FANOUT_LIMIT', 0):
+            timeline_entries(self.reader.pk)
+            post = Post.objects.create(text='Новый пост', author=self.author)
+        cache.delete(CELEBRITIES_KEY)
+        self.assertEqual(self.pks(), [post.pk for post in self.feed()])
+        _, excluded, entries = cache.get(timeline_key(self.reader.pk))
+        self.assertEqual(excluded, frozenset())
+        self.assertEqual(entries[0][1], post.pk)
+
+    def test_rebuild_timelines_command(self):
+        call_command('rebuild_timelines', stdout=mock.MagicMock())
+        _, _, entries = cache.get(timeline_key(self.reader.pk))
+        self.assertEqual(
+            [pk for _, pk in entries], [post.pk for post in self.feed()]
+        )
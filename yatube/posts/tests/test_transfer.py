@@ -0,0 +1,139 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.counts import feed_key
+from posts.feed_cache import feed_generation
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+from posts.search import search
+
+User = get_user_model()
+
+PUB_DATE = datetime(2020, 5, 17, 12, 30, tzinfo=timezone.utc)
+
+
+class TransferTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=group, text='Коты спят'
+        )
+        Post.objects.filter(pk=cls.post.pk).update(pub_date=PUB_DATE)
+        Post.objects.create(author=reader, text='Без группы')
+        Comment.objects.create(
+            post=cls.post, author=reader, text='Котами, "с кавычками"'
+        )
+        Follow.objects.create(user=reader, author=cls.author)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def roundtrip(self, fmt):
+        path = os.path.join(self.directory, f'dump.{fmt}')
+        call_command(
+            'export_posts', path, '--format', fmt, stderr=StringIO()
+        )
+        Group.objects.all().delete()
+        User.objects.filter(username='reader').delete()
+        Post.objects.all().delete()
+        out = StringIO()
+        call_command(
+            'import_posts', path, '--format', fmt, '--batch-size', '1',
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def check_imported(self):
+        self.assertEqual(Group.objects.get().slug, 'group')
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.pub_date, PUB_DATE)
+        self.assertEqual(post.group.slug, 'group')
+        self.assertEqual(post.tokens, 'кот спят')
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(
+            post.comments.get().text, 'Котами, "с кавычками"'
+        )
+        reader = User.objects.get(username='reader')
+        self.assertFalse(reader.has_usable_password())
+        self.assertTrue(
+            Follow.objects.filter(user=reader, author=self.author).exists()
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).followers_count, 1
+        )
+        self.assertEqual(AuthorStats.objects.get(user=reader).posts_count, 1)
+        posts, _ = search(Post.objects.all(), 'кот', 10)
+        self.assertEqual([found.pk for found in posts], [post.pk])
+
+    def test_jsonl_roundtrip(self):
+        out = self.roundtrip('jsonl')
+        self.check_imported()
+        self.assertIn('post: 2', out)
+
+    def test_csv_roundtrip(self):
+        self.roundtrip('csv')
+        self.check_imported()
+
+    def test_export_to_stdout(self):
+        out = StringIO()
+        call_command('export_posts', stdout=out, stderr=StringIO())
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertIn('"type": "group"', lines[0])
+
+    def test_unknown_group_aborts(self):
+        path = os.path.join(self.directory, 'broken.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(
+                '{"type": "post", "id": 100, "author": "author", '
+                '"group": "missing", "text": "x", '
+                '"pub_date": "2020-01-01T00:00:00+00:00", "image": ""}\n'
+            )
+        with self.assertRaises(CommandError):
+            call_command('import_posts', path, stdout=StringIO())
+        self.assertFalse(Post.objects.filter(pk=100).exists())
+
+    def test_failed_batch_keeps_committed_state(self):
+        path = os.path.join(self.directory, 'duplicate.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            for pk in (100, 101, 100, 102):
+                stream.write(
+                    f'{{"type": "post", "id": {pk}, "author": "author", '
+                    '"group": null, "text": "x", '
+                    '"pub_date": "2020-01-01T00:00:00+00:00", '
+                    '"image": ""}\n'
+                )
+        cache.set(feed_key('index'), 2)
+        generation = feed_generation('index')
+        with self.assertRaises(CommandError):
+            call_command(
+                'import_posts', path, '--batch-size', '1',
+                stdout=StringIO(),
+            )
+        self.assertEqual(
+            set(Post.objects.filter(pk__gte=100).values_list(
+                'pk', flat=True
+            )),
+            {100, 101},
+        )
+        self.assertEqual(
+            AuthorStats.objects.get(user=self.author).posts_count, 3
+        )
+        self.assertEqual(cache.get(feed_key('index')), 4)
+        self.assertNotEqual(feed_generation('index'), generation)
+        self.assertGreater(
+            Post.objects.create(author=self.author, text='Новый').pk, 101
+        )
@@ -126,6 +126,9 @@ class PostURLTests(TestCase):
             text='тестовый текст'
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_comment_only_authorized_user(self):
         response = self.guest_client.get('/create/', follow=True)
         self.assertEqual(response.status_code, HTTPStatus.OK.value)
@@ -134,8 +137,7 @@ class PostURLTests(TestCase):
         """Проверка работы кеша главной страницы"""
         response_1 = self.guest_client.get(reverse('posts:index'))
         resp_1 = response_1.content
-        post_to_delete = self.post
-        post_to_delete.delete()
+        Post.objects.filter(pk=self.post.pk).update(text='без сигналов')
         response_2 = self.guest_client.get(reverse('posts:index'))
         resp_2 = response_2.content
         self.assertEqual(resp_1, resp_2)
@@ -144,3 +146,23 @@ class PostURLTests(TestCase):
         resp_3 = response_3.content
         self.assertNotEqual(resp_3, resp_1)
         self.assertNotEqual(resp_3, resp_2)
+
+    def test_index_page_cache_invalidated_on_delete(self):
+        """Удалённый пост сразу пропадает из кеша главной"""
+        response_1 = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response_1, self.post.text)
+        self.post.delete()
+        response_2 = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response_2, self.post.text)
+
+    def test_index_page_cache_varies_by_page(self):
+        """Каждая страница главной кешируется отдельно"""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'пост номер {i}') for i in range(10)
+        )
+        response_1 = self.guest_client.get(reverse('posts:index'))
+        response_2 = self.guest_client.get(
+            reverse('posts:index') + '?page=2'
+        )
+        self.assertNotContains(response_1, self.post.text)
+        self.assertContains(response_2, self.post.text)
@@ -237,3 +237,49 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(
                     len(response.context.get('page_obj').object_list), 3
                 )
+
+    def test_page_past_the_end_shows_last_page(self):
+        reverse_names = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        last_page = list(Post.objects.order_by('-pub_date', '-pk')[10:])
+        for reverse_name in reverse_names:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.client.get(reverse_name + '?page=99')
+                page_obj = response.context['page_obj']
+                self.assertEqual(page_obj.number, 2)
+                self.assertFalse(page_obj.has_next())
+                self.assertEqual(list(page_obj), last_page)
+                response = self.client.get(
+                    reverse_name + f'?cursor={page_obj.previous_cursor}'
+                )
+                self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_cursor_pages_walk_feed_without_gaps(self):
+        """Курсоры next/previous обходят ленту без пропусков и повторов."""
+        response = self.client.get(reverse('posts:index'))
+        first_page = list(response.context['page_obj'])
+        next_cursor = response.context['page_obj'].next_cursor
+        response = self.client.get(
+            reverse('posts:index') + f'?cursor={next_cursor}'
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.number, 2)
+        self.assertFalse(page_obj.has_next())
+        self.assertEqual(
+            first_page + list(page_obj),
+            list(Post.objects.order_by('-pub_date', '-pk'))
+        )
+        response = self.client.get(
+            reverse('posts:index') + f'?cursor={page_obj.previous_cursor}'
+        )
+        self.assertEqual(list(response.context['page_obj']), first_page)
+
+    def test_broken_cursor_shows_first_page(self):
+        response = self.client.get(reverse('posts:index') + '?cursor=xyz')
+        self.assertEqual(response.context['page_obj'].number, 1)
+        self.assertEqual(
+            len(response.context['page_obj'].object_list), 10
+        )
@@ -0,0 +1,135 @@
+"""Нормализация текста постов и комментариев для поиска.
+
+tokenize() приводит текст к нижнему регистру, заменяет «ё» на «е» и
+сводит русские слова к основам стеммером Snowball (Портера) для
+русского языка, так что «котами» и «коты» дают один терм «кот».
+Основы сохраняются в поле tokens строки при сохранении.
+"""
+import re
+
+TERM_LENGTH = 64
+VOWELS = 'аеиоуыэюя'
+
+
+def _by_length(*groups):
+    """Окончания групп от длинных к коротким с флагом «после а/я»."""
+    return sorted(
+        (
+            (ending, after_a)
+            for endings, after_a in groups
+            for ending in endings.split()
+        ),
+        key=lambda item: -len(item[0]),
+    )
+
+
+PERFECTIVE_GERUND = _by_length(
+    ('в вши вшись', True),
+    ('ив ивши ившись ыв ывши ывшись', False),
+)
+ADJECTIVE = _by_length((
+    'ее ие ые ое ими ыми ей ий ый ой ем им ым ом его ого ему ому '
+    'их ых ую юю ая яя ою ею',
+    False,
+))
+PARTICIPLE = _by_length(
+    ('ем нн вш ющ щ', True),
+    ('ивш ывш ующ', False),
+)
+REFLEXIVE = _by_length(('ся сь', False))
+VERB = _by_length(
+    ('ла на ете йте ли й л ем н ло но ет ют ны ть ешь нно', True),
+    (
+        'ила ыла ена ейте уйте ите или ыли ей уй ил ыл им ым ен ило ыло '
+        'ено ят ует уют ит ыт ены ить ыть ишь ую ю',
+        False,
+    ),
+)
+NOUN = _by_length((
+    'а ев ов ие ье е иями ями ами еи ии и ией ей ой ий й иям ям ием ем '
+    'ам ом о у ах иях ях ы ь ию ью ю ия ья я',
+    False,
+))
+SUPERLATIVE = _by_length(('ейш ейше', False))
+DERIVATIONAL = _by_length(('ост ость', False))
+
+
+def _regions(word):
+    """Начала областей RV и R2 алгоритма Snowball."""
+    rv = next(
+        (i + 1 for i, char in enumerate(word) if char in VOWELS), len(word)
+    )
+    r1 = r2 = len(word)
+    for i in range(1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def _strip(word, region, endings):
+    """Слово без самого длинного окончания из endings внутри region.
+
+    None, если ни одно окончание не подошло.
+    """
+    for ending, after_a in endings:
+        start = len(word) - len(ending)
+        if start < region or not word.endswith(ending):
+            continue
+        if not after_a:
+            return word[:start]
+        if start - 1 >= region and word[start - 1] in 'ая':
+            return word[:start]
+    return None
+
+
+def stem(word):
+    """Основа русского слова; прочие слова возвращаются как есть."""
+    word = word.lower().replace('ё', 'е')
+    if not re.search('[а-я]', word):
+        return word
+    rv, r2 = _regions(word)
+
+    stemmed = _strip(word, rv, PERFECTIVE_GERUND)
+    if stemmed is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        stemmed = _strip(word, rv, ADJECTIVE)
+        if stemmed is not None:
+            stemmed = _strip(stemmed, rv, PARTICIPLE) or stemmed
+        else:
+            stemmed = (
+                _strip(word, rv, VERB) or _strip(word, rv, NOUN) or word
+            )
+    word = stemmed
+
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _strip(word, r2, DERIVATIONAL) or word
+
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+    superlative = _strip(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        if superlative.endswith('нн') and len(superlative) - 2 >= rv:
+            return superlative[:-1]
+        return superlative
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Термы текста в порядке появления."""
+    return [
+        stem(token)[:TERM_LENGTH]
+        for token in re.findall(r'\w+', text.lower().replace('ё', 'е'))
+    ]
+
+
+def token_string(text):
+    """Значение поля tokens: термы через пробел."""
+    return ' '.join(tokenize(text))
@@ -0,0 +1,80 @@
+"""Фоновая генерация миниатюр картинок постов.
+
+Шаблоны лент выводят варианты из posts.images, а пока их нет —
+{% thumbnail %} с размерами из THUMBNAIL_SIZES; если миниатюра уже
+создана здесь, запрос только читает её из KVStore.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connections, transaction
+from sorl.thumbnail import get_thumbnail
+
+from .images import build_variants
+
+logger = logging.getLogger(__name__)
+
+# Должны совпадать с аргументами {% thumbnail %} в шаблонах posts.
+THUMBNAIL_SIZES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+THUMBNAIL_WORKERS = 2
+
+_executor = ThreadPoolExecutor(
+    max_workers=THUMBNAIL_WORKERS,
+    thread_name_prefix='thumbnails',
+)
+
+
+def generate_thumbnails(name):
+    """Создаёт все миниатюры картинки name; ошибки только логируются."""
+    try:
+        for geometry, options in THUMBNAIL_SIZES:
+            get_thumbnail(name, geometry, **options)
+        build_variants(name)
+    except Exception:
+        logger.exception('Не удалось создать миниатюры для %s', name)
+        return False
+    return True
+
+
+def _generate_in_worker(name):
+    try:
+        return generate_thumbnails(name)
+    finally:
+        connections.close_all()
+
+
+def warm_thumbnails(names, workers=THUMBNAIL_WORKERS):
+    """Параллельно создаёт миниатюры; возвращает число успешных."""
+    with ThreadPoolExecutor(
+        max_workers=workers,
+        thread_name_prefix='thumbnails',
+    ) as executor:
+        return sum(executor.map(_generate_in_worker, names))
+
+
+def _submit(name):
+    if settings.POSTS_THUMBNAILS_ASYNC:
+        _executor.submit(_generate_in_worker, name)
+    else:
+        generate_thumbnails(name)
+
+
+def enqueue_thumbnails(post):
+    """Ставит генерацию в пул потоков после коммита транзакции.
+
+    При POSTS_THUMBNAILS_ASYNC = False миниатюры создаются сразу после
+    коммита в текущем потоке.
+    """
+    if not post.image:
+        return
+    name = post.image.name
+    try:
+        if not post.image.storage.exists(name):
+            return
+    except (SuspiciousFileOperation, OSError):
+        return
+    transaction.on_commit(lambda: _submit(name))
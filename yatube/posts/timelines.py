@@ -0,0 +1,182 @@
+"""Материализованные ленты подписок (fan-out-on-write).
+
+Лента пользователя — список пар (pub_date, id) постов авторов, на
+которых он подписан, от новых к старым. Новый пост дописывается в ленты
+подписчиков при сохранении; посты авторов с очень большим числом
+подписчиков в ленты не раскладываются, а подмешиваются при чтении.
+
+Сохранённый список не правится на месте: каждый новый пост получает
+номер в журнале ленты через атомарный cache.incr и кладётся отдельным
+ключом, а при чтении вливается в снимок. Так параллельные авторы не
+затирают записи друг друга.
+"""
+import heapq
+import time
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Follow, Post
+
+TIMELINE_LENGTH = 1000
+FANOUT_LIMIT = 1000
+CELEBRITIES_TIMEOUT = 60 * 10
+CELEBRITIES_KEY = 'timeline_celebrities'
+# Сколько хранятся записи журнала, ещё не влитые в снимок ленты.
+PENDING_TIMEOUT = 60 * 60 * 24
+
+
+def timeline_key(user_id):
+    return f'timeline:{user_id}'
+
+
+def sequence_key(user_id):
+    return f'timeline_seq:{user_id}'
+
+
+def pending_key(user_id, number):
+    return f'timeline_seq:{user_id}:{number}'
+
+
+def celebrities():
+    """Авторы, чьи посты подмешиваются при чтении, а не при записи."""
+    return cache.get_or_set(
+        CELEBRITIES_KEY,
+        lambda: set(
+            Follow.objects.values('author_id')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=FANOUT_LIMIT)
+            .values_list('author_id', flat=True)
+        ),
+        CELEBRITIES_TIMEOUT,
+    )
+
+
+def _entries(queryset):
+    return list(
+        queryset.order_by('-pub_date', '-pk')
+        .values_list('pub_date', 'pk')[:TIMELINE_LENGTH]
+    )
+
+
+def _sequence(user_id):
+    # Потерянный счётчик начинается заново со времени, как поколения
+    # feed_cache, чтобы номера не совпали с записями прежнего журнала.
+    return cache.get_or_set(
+        sequence_key(user_id), lambda: time.time_ns(), None
+    )
+
+
+def _save(user_id, sequence, excluded, entries):
+    cache.set(timeline_key(user_id), (sequence, excluded, entries), None)
+
+
+def build_timeline(user_id):
+    """Собирает ленту из БД и сохраняет её в кеше."""
+    sequence = _sequence(user_id)
+    excluded = frozenset(celebrities())
+    entries = _entries(
+        Post.objects.filter(author__following__user_id=user_id)
+        .exclude(author_id__in=excluded)
+    )
+    _save(user_id, sequence, excluded, entries)
+    return entries
+
+
+def _merge(*lists):
+    merged, seen = [], set()
+    for entry in heapq.merge(*lists, reverse=True):
+        if entry[1] not in seen:
+            seen.add(entry[1])
+            merged.append(entry)
+    return merged[:TIMELINE_LENGTH]
+
+
+def _load(user_id):
+    """Снимок ленты с влитым журналом или None, если её надо собрать.
+
+    Лента собирается заново и тогда, когда кто-то из исключённых при
+    сборке авторов перестал быть celebrity: его постов в снимке нет.
+    """
+    snapshot = cache.get(timeline_key(user_id))
+    current = cache.get(sequence_key(user_id))
+    if snapshot is None or current is None:
+        return None
+    sequence, excluded, entries = snapshot
+    if not excluded <= celebrities():
+        return None
+    if current == sequence:
+        return entries
+    if not 0 < current - sequence <= TIMELINE_LENGTH:
+        return None
+    keys = [
+        pending_key(user_id, number)
+        for number in range(sequence + 1, current + 1)
+    ]
+    pending = cache.get_many(keys)
+    if len(pending) < len(keys):
+        return None
+    entries = _merge(entries, sorted(pending.values(), reverse=True))
+    _save(user_id, current, excluded, entries)
+    return entries
+
+
+def timeline_entries(user_id):
+    """Лента пользователя вместе с постами авторов из celebrities()."""
+    entries = _load(user_id)
+    if entries is None:
+        entries = build_timeline(user_id)
+    authors = celebrities()
+    if not authors:
+        return entries
+    pull = list(
+        Follow.objects.filter(
+            user_id=user_id,
+            author_id__in=authors,
+        ).values_list('author_id', flat=True)
+    )
+    if not pull:
+        return entries
+    return _merge(entries, _entries(Post.objects.filter(author_id__in=pull)))
+
+
+def _followers(author_id):
+    return Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+
+
+def push_post(post):
+    """Добавляет пост в начало лент всех подписчиков автора."""
+    push_posts(post.author_id, [post])
+
+
+def push_posts(author_id, posts):
+    """То же для нескольких новых постов автора за одно обращение."""
+    if not posts or author_id in celebrities():
+        return
+    new = [(post.pub_date, post.pk) for post in posts]
+    pending = {}
+    for user_id in _followers(author_id):
+        try:
+            last = cache.incr(sequence_key(user_id), len(new))
+        except ValueError:
+            # Без счётчика снимку не с чем сверяться: лента соберётся
+            # заново при чтении.
+            reset_timeline(user_id)
+            continue
+        for number, entry in enumerate(new, last - len(new) + 1):
+            pending[pending_key(user_id, number)] = entry
+    cache.set_many(pending, PENDING_TIMEOUT)
+
+
+def remove_post(post):
+    """Сбрасывает ленты подписчиков автора удалённого поста."""
+    cache.delete_many([
+        timeline_key(user_id) for user_id in _followers(post.author_id)
+    ])
+
+
+def reset_timeline(user_id):
+    """Сбрасывает ленту — она соберётся заново при следующем чтении."""
+    cache.delete(timeline_key(user_id))
@@ -0,0 +1,326 @@
+"""Потоковая выгрузка и загрузка групп, постов, комментариев и подписок.
+
+Записи идут в порядке group, post, comment, follow, чтобы при загрузке
+всё, на что ссылается запись, уже было в базе. Авторы и группы
+указываются username и slug, id постов и комментариев сохраняются.
+Файлы картинок не переносятся — только их имена.
+"""
+import csv
+import json
+from collections import Counter
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connections, router, transaction
+from django.utils.dateparse import parse_datetime
+
+from .counts import bump, feed_key
+from .feed_cache import bump_generation
+from .models import Comment, Follow, Group, Post
+from .search import get_index
+from .stats import reconcile_author_stats, reconcile_comments_count
+from .text import token_string
+from .timelines import reset_timeline
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+# Столбцы CSV: объединение полей записей всех типов.
+CSV_FIELDS = (
+    'type', 'id', 'slug', 'title', 'description', 'user', 'author',
+    'group', 'post', 'text', 'pub_date', 'created', 'image',
+)
+EXPORTS = (
+    ('group', Group.objects, ('slug', 'title', 'description')),
+    ('post', Post.objects, (
+        ('id', 'pk'), ('author', 'author__username'),
+        ('group', 'group__slug'), 'text', 'pub_date', 'image',
+    )),
+    ('comment', Comment.objects, (
+        ('id', 'pk'), ('post', 'post_id'),
+        ('author', 'author__username'), 'text', 'created',
+    )),
+    ('follow', Follow.objects, (
+        ('user', 'user__username'), ('author', 'author__username'),
+    )),
+)
+
+
+def _records(kind, queryset, fields, chunk_size):
+    fields = [
+        field if isinstance(field, tuple) else (field, field)
+        for field in fields
+    ]
+    rows = queryset.order_by('pk').values_list(
+        *(lookup for _, lookup in fields)
+    )
+    for row in rows.iterator(chunk_size):
+        record = {'type': kind}
+        for (name, _), value in zip(fields, row):
+            record[name] = (
+                value.isoformat() if hasattr(value, 'isoformat') else value
+            )
+        yield record
+
+
+def export_records(chunk_size=CHUNK_SIZE):
+    """Словари всех записей; в памяти держится не больше chunk_size."""
+    for kind, manager, fields in EXPORTS:
+        yield from _records(kind, manager.all(), fields, chunk_size)
+
+
+def author_records(author, comments=False, chunk_size=CHUNK_SIZE):
+    """Посты автора и, если нужно, комментарии к ним."""
+    exports = dict((kind, fields) for kind, _, fields in EXPORTS)
+    yield from _records(
+        'post', author.posts.all(), exports['post'], chunk_size
+    )
+    if comments:
+        yield from _records(
+            'comment',
+            Comment.objects.filter(post__author=author),
+            exports['comment'],
+            chunk_size,
+        )
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def format_records(records, fmt):
+    """Строки файла выгрузки по одной на запись."""
+    if fmt == 'csv':
+        writer = csv.DictWriter(_Echo(), CSV_FIELDS)
+        yield writer.writeheader()
+        for record in records:
+            yield writer.writerow(record)
+        return
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def write_records(records, stream, fmt):
+    """Пишет records в stream, возвращает их число."""
+    lines = format_records(records, fmt)
+    if fmt == 'csv':
+        stream.write(next(lines))
+    total = 0
+    for total, line in enumerate(lines, 1):
+        stream.write(line)
+    return total
+
+
+def read_records(stream, fmt):
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield {key: value or None for key, value in row.items()}
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+@contextmanager
+def _keep_dates(*fields):
+    """Отключает auto_now_add, чтобы сохранить даты из файла."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    """Загружает записи пачками, каждая пачка — в своей транзакции.
+
+    Пользователи и группы ищутся по словарям, загруженным один раз;
+    отсутствующие пользователи создаются без пароля.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.index = get_index()
+        self.comment_index = get_index(Comment)
+        self.counts = Counter()
+        self.feeds = Counter()
+        self.authors = set()
+        self.followers = set()
+
+    def run(self, records):
+        """Загружает records и возвращает число записей каждого типа."""
+        batch, kind = [], None
+        # Если пачка упала, уже сохранённые пачки остаются в базе, и
+        # счётчики, ленты и последовательности id всё равно догоняются.
+        try:
+            with _keep_dates(
+                Post._meta.get_field('pub_date'),
+                Comment._meta.get_field('created'),
+            ):
+                for record in records:
+                    if batch and (
+                        record['type'] != kind
+                        or len(batch) >= self.batch_size
+                    ):
+                        self._flush(kind, batch)
+                        batch = []
+                    kind = record['type']
+                    batch.append(record)
+                if batch:
+                    self._flush(kind, batch)
+        finally:
+            self._finish()
+        return self.counts
+
+    def _flush(self, kind, batch):
+        loader = getattr(self, f'_load_{kind}', None)
+        if loader is None:
+            raise ValueError(f'Неизвестный тип записи: {kind}')
+        with transaction.atomic():
+            loaded = loader(batch)
+        # Учитываем только пачки, которые дошли до коммита.
+        self.counts[kind] += len(batch)
+        noter = getattr(self, f'_note_{kind}', None)
+        if noter is not None:
+            noter(loaded)
+
+    def _user_ids(self, usernames):
+        missing = set(usernames) - self.users.keys()
+        if missing:
+            User.objects.bulk_create(
+                [
+                    User(username=name, password=make_password(None))
+                    for name in missing
+                ],
+                ignore_conflicts=True,
+            )
+            self.users.update(
+                User.objects.filter(username__in=missing)
+                .values_list('username', 'pk')
+            )
+        return self.users
+
+    def _group_id(self, slug):
+        if slug is None:
+            return None
+        try:
+            return self.groups[slug]
+        except KeyError:
+            raise ValueError(f'Неизвестная группа: {slug}') from None
+
+    def _load_group(self, batch):
+        Group.objects.bulk_create(
+            [
+                Group(
+                    slug=record['slug'],
+                    title=record['title'],
+                    description=record['description'] or '',
+                )
+                for record in batch
+            ],
+            ignore_conflicts=True,
+        )
+        self.groups.update(
+            Group.objects.filter(slug__in=[r['slug'] for r in batch])
+            .values_list('slug', 'pk')
+        )
+
+    def _load_post(self, batch):
+        users = self._user_ids(record['author'] for record in batch)
+        posts = [
+            Post(
+                id=int(record['id']),
+                author_id=users[record['author']],
+                group_id=self._group_id(record['group']),
+                text=record['text'],
+                tokens=token_string(record['text']),
+                pub_date=parse_datetime(record['pub_date']),
+                image=record['image'] or '',
+            )
+            for record in batch
+        ]
+        Post.objects.bulk_create(posts)
+        self.index.add(posts)
+        return posts
+
+    def _note_post(self, posts):
+        for post in posts:
+            self.feeds[feed_key('index')] += 1
+            self.feeds[feed_key('author', post.author_id)] += 1
+            if post.group_id is not None:
+                self.feeds[feed_key('group', post.group_id)] += 1
+            self.authors.add(post.author_id)
+
+    def _load_comment(self, batch):
+        users = self._user_ids(record['author'] for record in batch)
+        comments = [
+            Comment(
+                id=int(record['id']),
+                post_id=int(record['post']),
+                author_id=users[record['author']],
+                text=record['text'],
+                tokens=token_string(record['text']),
+                created=parse_datetime(record['created']),
+            )
+            for record in batch
+        ]
+        Comment.objects.bulk_create(comments)
+        self.comment_index.add(comments)
+
+    def _load_follow(self, batch):
+        users = self._user_ids(
+            name for record in batch
+            for name in (record['user'], record['author'])
+        )
+        Follow.objects.bulk_create(
+            [
+                Follow(
+                    user_id=users[record['user']],
+                    author_id=users[record['author']],
+                )
+                for record in batch
+            ],
+            ignore_conflicts=True,
+        )
+        return [users[record['user']] for record in batch]
+
+    def _note_follow(self, user_ids):
+        self.followers.update(user_ids)
+
+    def _finish(self):
+        """То, что при обычном сохранении делают сигналы, — одним разом."""
+        if not self.counts:
+            return
+        connection = connections[router.db_for_write(Post)]
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [Post, Comment]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        reconcile_author_stats()
+        if self.counts['comment']:
+            reconcile_comments_count()
+        for key, delta in self.feeds.items():
+            bump(key, delta)
+        authors = list(self.authors)
+        for start in range(0, len(authors), self.batch_size):
+            self.followers.update(
+                Follow.objects.filter(
+                    author_id__in=authors[start:start + self.batch_size]
+                ).values_list('user_id', flat=True)
+            )
+        for user_id in self.followers:
+            reset_timeline(user_id)
+        bump_generation()
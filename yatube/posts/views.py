@@ -1,28 +1,50 @@
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect, render, get_object_or_404
-from .models import Post, Group, User, Follow
-from django.core.paginator import Paginator
-from .forms import PostForm, CommentForm
+from .models import Post, Group, User, Follow, Comment
+from .forms import PostForm, CommentForm, SearchForm
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition
+from .paginators import CursorPaginator, TimelinePaginator, comments_chunk
+from .conditional import export_deleted_at, feed_etag, post_etag
+from .counts import feed_count, feed_key
+from .feed_cache import feed_generation
+from .search import search as search_posts
+from .timelines import timeline_entries
+from .transfer import FORMATS, author_records, format_records
 
 ELEMENT_QUANTITY = 10
+COMMENTS_QUANTITY = 50
 
 
-def get_page(posts, request):
-    paginator = Paginator(posts, ELEMENT_QUANTITY)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+def get_page(posts, request, count_key, estimate=False):
+    paginator = CursorPaginator(
+        posts,
+        ELEMENT_QUANTITY,
+        total=feed_count(count_key, posts, estimate),
+    )
+    return paginator.get_page(
+        request.GET.get('cursor'),
+        request.GET.get('page'),
+    )
 
 
+@condition(etag_func=feed_etag('index'))
 def index(request):
-    post_list = Post.objects.select_related('group')
-    page_obj = get_page(post_list, request)
-    return render(request, 'posts/index.html', {'page_obj': page_obj})
+    post_list = Post.objects.for_feed()
+    page_obj = get_page(post_list, request, feed_key('index'), True)
+    context = {
+        'page_obj': page_obj,
+        'feed_version': feed_generation('index'),
+    }
+    return render(request, 'posts/index.html', context)
 
 
+@condition(etag_func=feed_etag('group'))
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = get_page(post_list, request)
+    post_list = group.posts.for_feed()
+    page_obj = get_page(post_list, request, feed_key('group', group.pk))
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -30,10 +52,14 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@condition(etag_func=feed_etag('profile'))
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    page_obj = get_page(post_list, request)
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username,
+    )
+    post_list = author.posts.for_feed()
+    page_obj = get_page(post_list, request, feed_key('author', author.pk))
     following = request.user.is_authenticated and (
         Follow.objects.filter(
             user=request.user,
@@ -48,18 +74,140 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+EXPORT_CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def export_last_modified(request, username):
+    """Время последнего изменения или удаления записи из выгрузки."""
+    author_id = (
+        User.objects.filter(username=username)
+        .values_list('pk', flat=True)
+        .first()
+    )
+    if author_id is None:
+        return None
+    posts = Post.objects.filter(author_id=author_id)
+    dates = [
+        posts.aggregate(last=Max('updated'))['last'],
+        export_deleted_at(author_id),
+    ]
+    if request.GET.get('comments'):
+        dates.append(
+            Comment.objects.filter(post__in=posts)
+            .aggregate(last=Max('created'))['last']
+        )
+    dates = [date for date in dates if date is not None]
+    return max(dates) if dates else None
+
+
+@condition(last_modified_func=export_last_modified)
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in FORMATS:
+        fmt = 'jsonl'
+    response = StreamingHttpResponse(
+        format_records(
+            author_records(author, bool(request.GET.get('comments'))),
+            fmt,
+        ),
+        content_type=EXPORT_CONTENT_TYPES[fmt],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}.{fmt}"'
+    )
+    return response
+
+
+@condition(etag_func=post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'),
+        id=post_id,
+    )
     form = CommentForm(request.POST or None)
-    post_comments = post.comments.all()
+    post_comments, next_comments = comments_chunk(
+        post.comments.select_related('author'),
+        COMMENTS_QUANTITY,
+        request.GET.get('comments'),
+    )
     context = {
         'post': post,
         'form': form,
         'comments': post_comments,
+        'next_comments': next_comments,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def post_comments(request, post_id):
+    comments, next_comments = comments_chunk(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_QUANTITY,
+        request.GET.get('after'),
+    )
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created': comment.created,
+            }
+            for comment in comments
+        ],
+        'next': next_comments,
+    })
+
+
+def find_posts(request):
+    form = SearchForm(request.GET or None)
+    if not form.is_valid():
+        return form, [], None
+    posts, next_cursor = search_posts(
+        form.filter(Post.objects.for_feed()),
+        form.cleaned_data['q'],
+        ELEMENT_QUANTITY,
+        form.cleaned_data['cursor'],
+    )
+    return form, posts, next_cursor
+
+
+def search(request):
+    form, posts, next_cursor = find_posts(request)
+    query = request.GET.copy()
+    query['cursor'] = next_cursor or ''
+    context = {
+        'form': form,
+        'posts': posts,
+        'next_query': next_cursor and query.urlencode(),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def search_api(request):
+    form, posts, next_cursor = find_posts(request)
+    if form.errors:
+        return JsonResponse({'errors': form.errors}, status=400)
+    return JsonResponse({
+        'results': [
+            {
+                'id': post.pk,
+                'author': post.author.username,
+                'group': post.group and post.group.slug,
+                'text': post.text,
+                'pub_date': post.pub_date,
+                'rank': post.rank,
+            }
+            for post in posts
+        ],
+        'next': next_cursor,
+    })
+
+
 @login_required
 def post_create(request):
     name = request.user.username
@@ -110,9 +258,17 @@ def add_comment(request, post_id):
 
 
 @login_required
+@condition(etag_func=feed_etag('follow'))
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_page(posts, request)
+    paginator = TimelinePaginator(
+        timeline_entries(request.user.pk),
+        ELEMENT_QUANTITY,
+        Post.objects.for_feed(),
+    )
+    page_obj = paginator.get_page(
+        request.GET.get('cursor'),
+        request.GET.get('page'),
+    )
     is_follow = True
     context = {
         'page_obj': page_obj,
@@ -0,0 +1,11 @@
+"""Настройки выбираются переменной окружения YATUBE_ENV.
+
+dev (по умолчанию) — локальная разработка с django-debug-toolbar,
+prod — боевой профиль; см. модули dev и prod.
+"""
+import os
+
+if os.environ.get('YATUBE_ENV', 'dev') == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
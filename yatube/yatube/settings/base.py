@@ -1,5 +1,5 @@
 """
-Django settings for yatube project.
+Django settings for yatube project: common part for dev and prod.
 
 Generated by 'django-admin startproject' using Django 2.2.19.
 
@@ -13,7 +13,9 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
 
 
 # Quick-start development settings - unsuitable for production
@@ -23,7 +25,7 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = '+y2^t_#(qta!n09rcil@0k-z6n_=0+1ihj_zxx_i1m(lyrf@2a'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = False
 
 ALLOWED_HOSTS = [
     'www.dwayne.pythonanywhere.com',
@@ -42,6 +44,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -49,10 +52,11 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,11 +64,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',  
-]
-
-INTERNAL_IPS = [
-    '127.0.0.1',
 ]
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -94,13 +93,34 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# core.backends.sqlite3 — SQLite в режиме WAL с настройками соединения.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
 
+# Реплики для чтения постов, групп, комментариев и подписок.
+# YATUBE_REPLICAS=2 подключает файлы db.replica1.sqlite3 и
+# db.replica2.sqlite3; их заполняет команда replicate_db.
+DATABASE_REPLICAS = []
+for number in range(1, int(os.environ.get('YATUBE_REPLICAS', 0)) + 1):
+    DATABASE_REPLICAS.append(f'replica{number}')
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db.replica{number}.sqlite3'),
+        'OPTIONS': {'read_only': True},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Сколько секунд после записи пользователь (и ленты после смены
+# поколения, см. posts.feed_cache) читает с основной базы и как часто
+# перепроверяется доступность реплик.
+REPLICA_PIN_SECONDS = 5
+REPLICA_HEALTH_INTERVAL = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -141,6 +161,7 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -154,3 +175,27 @@ CACHES = {
     }
 }
 
+# Доля запросов, попадающих в лог yatube.timing, и период сводки (с).
+TIMING_SAMPLE_RATE = 0.01
+TIMING_FLUSH_INTERVAL = 60
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+THUMBNAIL_SQLITE_FILE = os.path.join(BASE_DIR, 'thumbnails.sqlite3')
+# False — миниатюры новой картинки создаются после коммита в том же
+# потоке, а не в пуле posts.thumbnails.
+POSTS_THUMBNAILS_ASYNC = True
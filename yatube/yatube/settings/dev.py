@@ -0,0 +1,31 @@
+"""Локальная разработка: DEBUG и django-debug-toolbar."""
+import os
+import tempfile
+
+from .base import *  # noqa: F401,F403
+from .base import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = True
+
+INSTALLED_APPS = INSTALLED_APPS + ['debug_toolbar']
+
+MIDDLEWARE = MIDDLEWARE + [
+    'debug_toolbar.middleware.DebugToolbarMiddleware',
+]
+
+INTERNAL_IPS = [
+    '127.0.0.1',
+]
+
+# Заголовок Server-Timing остаётся, выборочный лог не засоряет консоль.
+TIMING_SAMPLE_RATE = 0
+
+# Без пула задачи не переживают временный MEDIA_ROOT тестов и не пишут
+# варианты картинок в media/ репозитория.
+POSTS_THUMBNAILS_ASYNC = False
+
+# KVStore миниатюр runserver и тестов — во временном каталоге, а не
+# рядом с кодом: в нём записи о файлах из временных MEDIA_ROOT тестов.
+THUMBNAIL_SQLITE_FILE = os.path.join(
+    tempfile.gettempdir(), 'yatube-thumbnails.sqlite3'
+)
@@ -0,0 +1,91 @@
+"""Боевой профиль: без отладки и с настройками под нагрузку.
+
+Секретный ключ и хосты берутся из окружения. Шаблоны компилируются
+один раз на процесс, соединения с базой живут между запросами, кеш
+общий для всех процессов, статика отдаётся с хешем в имени файла
+(нужен collectstatic).
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import BASE_DIR, DATABASE_ROUTERS, DATABASES, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS',
+    'www.dwayne.pythonanywhere.com,dwayne.pythonanywhere.com',
+).split(',')
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+# Чтение и запись идут через разные соединения к одному файлу:
+# в WAL читатели не ждут пишущую транзакцию.
+DATABASES = {
+    **DATABASES,
+    'default': {
+        **DATABASES['default'],
+        'NAME': os.environ.get(
+            'DJANGO_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 600)),
+    },
+}
+DATABASES['reader'] = {
+    **DATABASES['default'],
+    'OPTIONS': {'read_only': True},
+    'TEST': {'MIRROR': 'default'},
+}
+# Что не ушло на реплики, читается через reader.
+DATABASE_ROUTERS = DATABASE_ROUTERS + ['core.routers.ReadWriteRouter']
+
+# Общий кеш — memcached (нужен python-memcached). Поколения лент
+# (posts.feed_cache), счётчики (posts.counts) и журналы лент подписок
+# (posts.timelines) опираются на атомарный incr и ключи без таймаута.
+# Файловый кеш включается только явно через DJANGO_CACHE_DIR, и с ним
+# эти механизмы деградируют: incr там — отдельные чтение и запись,
+# поэтому при параллельных записях фрагмент ленты может устареть на
+# свой таймаут, а по достижении MAX_ENTRIES удаляются случайные ключи,
+# в том числе бессрочные — ленты и счётчики тогда собираются заново.
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': os.environ['MEMCACHED_LOCATION'].split(','),
+        }
+    }
+elif os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['DJANGO_CACHE_DIR'],
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    raise ImproperlyConfigured(
+        'Задайте MEMCACHED_LOCATION или, для одной машины и с оговорками '
+        'из yatube/settings/prod.py, DJANGO_CACHE_DIR'
+    )
+
+STATICFILES_STORAGE = (
+    'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+)